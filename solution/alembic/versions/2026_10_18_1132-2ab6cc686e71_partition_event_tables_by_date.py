@@ -0,0 +1,110 @@
+"""partition event tables by date
+
+Revision ID: 2ab6cc686e71
+Revises: a343e5e87fd9
+Create Date: 2026-10-18 11:32:52.167297
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2ab6cc686e71"
+down_revision: Union[str, None] = "a343e5e87fd9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITION_SIZE = 30
+
+EVENT_TABLES = {
+    "unique_impressions": {
+        "columns": "client_id, campaign_id, date, id, cost",
+        "primary_key": "client_id, campaign_id, date, id",
+        "indexes": {
+            "ix_unique_impressions_campaign_id_date": (
+                "(campaign_id, date) INCLUDE (cost)"
+            ),
+        },
+    },
+    "unique_clicks": {
+        "columns": "client_id, date, id, campaign_id, cost",
+        "primary_key": None,
+        "indexes": {
+            "ix_unique_clicks_campaign_id_date": "(campaign_id, date) INCLUDE (cost)",
+            "ix_unique_clicks_client_id_campaign_id": "(client_id, campaign_id)",
+        },
+    },
+}
+
+
+def create_event_table(table: str, partition_by: str) -> None:
+    op.execute(
+        f"""
+        CREATE TABLE {table}_new (
+            client_id uuid NOT NULL,
+            campaign_id uuid NOT NULL,
+            date integer NOT NULL,
+            id uuid NOT NULL,
+            cost double precision NOT NULL
+        ) {partition_by}
+        """
+    )
+
+
+def replace_event_table(table: str) -> None:
+    definition = EVENT_TABLES[table]
+    columns = definition["columns"]
+    op.execute(f"INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table}")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    if definition["primary_key"]:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey "
+            f"PRIMARY KEY ({definition['primary_key']})"
+        )
+    for column, referred_table in (
+        ("campaign_id", "campaigns"),
+        ("client_id", "clients"),
+    ):
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {referred_table} (id)"
+        )
+    for index_name, index_columns in definition["indexes"].items():
+        op.execute(f"CREATE INDEX {index_name} ON {table} {index_columns}")
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    current_day = connection.execute(
+        sa.text('SELECT max("current_date") FROM "current_date"')
+    ).scalar()
+    for table in EVENT_TABLES:
+        first_day, last_day = connection.execute(
+            sa.text(f"SELECT min(date), max(date) FROM {table}")
+        ).one()
+        days = [day for day in (first_day, last_day, current_day) if day is not None]
+        create_event_table(table, partition_by="PARTITION BY RANGE (date)")
+        if days:
+            first_start = min(days) // PARTITION_SIZE * PARTITION_SIZE
+            last_start = max(days) // PARTITION_SIZE * PARTITION_SIZE
+            for start in range(
+                first_start, last_start + PARTITION_SIZE, PARTITION_SIZE
+            ):
+                op.execute(
+                    f"CREATE TABLE {table}_p{start} PARTITION OF {table}_new "
+                    f"FOR VALUES FROM ({start}) TO ({start + PARTITION_SIZE})"
+                )
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table}_new DEFAULT")
+        replace_event_table(table)
+
+
+def downgrade() -> None:
+    for table in EVENT_TABLES:
+        create_event_table(table, partition_by="")
+        replace_event_table(table)
@@ -0,0 +1,157 @@
+"""add campaign daily reach sketches
+
+Revision ID: 5a0ee147f7c5
+Revises: 2ab6cc686e71
+Create Date: 2026-10-18 11:37:16.777672
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a0ee147f7c5"
+down_revision: Union[str, None] = "2ab6cc686e71"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+HLL_FUNCTIONS = """
+CREATE FUNCTION hll_entry(client_id uuid) RETURNS bytea
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT substring(
+        int4send((
+            (hash & 1023) << 6 | coalesce(
+                nullif(
+                    position('1' IN reverse(
+                        ((hash >> 10) & 18014398509481983)::bit(54)::text
+                    )),
+                    0
+                ),
+                55
+            )
+        )::integer)
+        FROM 3 FOR 2
+    )
+    FROM (SELECT hashtextextended(client_id::text, 0) AS hash) AS hashed
+$$;
+
+CREATE FUNCTION hll_merge(a bytea, b bytea) RETURNS bytea
+LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $$
+DECLARE
+    registers CONSTANT integer := 1024;
+    merged bytea := a;
+    sparse bytea := b;
+    entry integer;
+    register integer;
+BEGIN
+    IF a IS NULL THEN
+        RETURN b;
+    ELSIF b IS NULL THEN
+        RETURN a;
+    END IF;
+    IF length(a) < length(b) THEN
+        merged := b;
+        sparse := a;
+    END IF;
+
+    IF length(merged) < registers THEN
+        IF length(merged) + length(sparse) < registers THEN
+            RETURN merged || sparse;
+        END IF;
+        sparse := merged || sparse;
+        merged := decode(repeat('00', registers), 'hex');
+    ELSIF length(sparse) = registers THEN
+        FOR register IN 0 .. registers - 1 LOOP
+            IF get_byte(sparse, register) > get_byte(merged, register) THEN
+                merged := set_byte(
+                    merged, register, get_byte(sparse, register)
+                );
+            END IF;
+        END LOOP;
+        RETURN merged;
+    END IF;
+
+    FOR offset_ IN 0 .. length(sparse) / 2 - 1 LOOP
+        entry := get_byte(sparse, offset_ * 2) << 8
+            | get_byte(sparse, offset_ * 2 + 1);
+        register := entry >> 6;
+        IF (entry & 63) > get_byte(merged, register) THEN
+            merged := set_byte(merged, register, entry & 63);
+        END IF;
+    END LOOP;
+    RETURN merged;
+END
+$$;
+
+CREATE FUNCTION hll_add(sketch bytea, client_id uuid) RETURNS bytea
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT hll_merge(sketch, hll_entry(client_id))
+$$;
+
+CREATE AGGREGATE hll_agg(uuid) (
+    SFUNC = hll_add,
+    STYPE = bytea,
+    INITCOND = ''
+);
+"""
+
+
+def upgrade() -> None:
+    op.execute(HLL_FUNCTIONS)
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table(
+        "campaign_daily_reach",
+        sa.Column("campaign_id", sa.Uuid(), nullable=False),
+        sa.Column("date", sa.Integer(), nullable=False),
+        sa.Column(
+            "impressions_sketch",
+            sa.LargeBinary(),
+            server_default="",
+            nullable=False,
+        ),
+        sa.Column(
+            "clicks_sketch",
+            sa.LargeBinary(),
+            server_default="",
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["campaign_id"],
+            ["campaigns.id"],
+        ),
+        sa.PrimaryKeyConstraint("campaign_id", "date"),
+    )
+    # ### end Alembic commands ###
+    op.execute("ALTER TABLE campaign_daily_reach SET (toast_tuple_target = 8160)")
+    op.execute(
+        """
+        INSERT INTO campaign_daily_reach (campaign_id, date, impressions_sketch)
+        SELECT campaign_id, date, hll_agg(client_id)
+        FROM unique_impressions
+        GROUP BY campaign_id, date
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO campaign_daily_reach (campaign_id, date, clicks_sketch)
+        SELECT campaign_id, date, hll_agg(client_id)
+        FROM unique_clicks
+        GROUP BY campaign_id, date
+        ON CONFLICT (campaign_id, date) DO UPDATE
+        SET clicks_sketch = excluded.clicks_sketch
+        """
+    )
+
+
+def downgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_table("campaign_daily_reach")
+    # ### end Alembic commands ###
+    op.execute("DROP AGGREGATE hll_agg(uuid)")
+    op.execute("DROP FUNCTION hll_add(bytea, uuid)")
+    op.execute("DROP FUNCTION hll_merge(bytea, bytea)")
+    op.execute("DROP FUNCTION hll_entry(uuid)")
@@ -0,0 +1,87 @@
+"""version ml score snapshots
+
+Revision ID: d13721f8bc02
+Revises: 5a0ee147f7c5
+Create Date: 2026-10-18 12:30:14.508311
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d13721f8bc02"
+down_revision: Union[str, None] = "5a0ee147f7c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_ml_scores_table(version_column: str, partition_by: str) -> None:
+    op.execute(
+        f"""
+        CREATE TABLE mlscores_new (
+            client_id uuid NOT NULL,
+            advertiser_id uuid NOT NULL,
+            score double precision NOT NULL,
+            id uuid NOT NULL{version_column}
+        ) {partition_by}
+        """
+    )
+
+
+def replace_ml_scores_table(
+    columns: str, primary_key: str, unique_columns: str, where: str = ""
+) -> None:
+    op.execute(
+        f"INSERT INTO mlscores_new ({columns}) SELECT {columns} FROM mlscores{where}"
+    )
+    op.execute("DROP TABLE mlscores")
+    op.execute("ALTER TABLE mlscores_new RENAME TO mlscores")
+    op.execute(
+        f"ALTER TABLE mlscores ADD CONSTRAINT mlscores_pkey PRIMARY KEY ({primary_key})"
+    )
+    op.execute(
+        "ALTER TABLE mlscores ADD CONSTRAINT uix_client_advertiser "
+        f"UNIQUE ({unique_columns})"
+    )
+    for column, referred_table in (
+        ("advertiser_id", "advertisers"),
+        ("client_id", "clients"),
+    ):
+        op.execute(
+            f"ALTER TABLE mlscores ADD CONSTRAINT mlscores_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {referred_table} (id)"
+        )
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE mlscores_version_seq START 1")
+    op.add_column(
+        "ml_score_state",
+        sa.Column("active_version", sa.Integer(), server_default="0", nullable=False),
+    )
+    create_ml_scores_table(
+        version_column=",\n            version integer DEFAULT 0 NOT NULL",
+        partition_by="PARTITION BY LIST (version)",
+    )
+    op.execute("CREATE TABLE mlscores_v0 PARTITION OF mlscores_new FOR VALUES IN (0)")
+    replace_ml_scores_table(
+        columns="client_id, advertiser_id, score, id",
+        primary_key="id, version",
+        unique_columns="version, client_id, advertiser_id",
+    )
+
+
+def downgrade() -> None:
+    create_ml_scores_table(version_column="", partition_by="")
+    replace_ml_scores_table(
+        columns="client_id, advertiser_id, score, id",
+        primary_key="id",
+        unique_columns="client_id, advertiser_id",
+        where=" WHERE version = (SELECT max(active_version) FROM ml_score_state)",
+    )
+    op.drop_column("ml_score_state", "active_version")
+    op.execute("DROP SEQUENCE mlscores_version_seq")
@@ -0,0 +1,48 @@
+"""make ml score state singleton
+
+Revision ID: 6b1f0c2e9a47
+Revises: d13721f8bc02
+Create Date: 2026-10-18 14:00:42.117305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6b1f0c2e9a47"
+down_revision: Union[str, None] = "d13721f8bc02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "DELETE FROM ml_score_state WHERE id NOT IN ("
+        "SELECT id FROM ml_score_state "
+        "ORDER BY active_version DESC, max_score DESC NULLS LAST LIMIT 1)"
+    )
+    op.add_column(
+        "ml_score_state",
+        sa.Column("singleton", sa.Boolean(), server_default=sa.true(), nullable=False),
+    )
+    op.create_unique_constraint(
+        "uq_ml_score_state_singleton", "ml_score_state", ["singleton"]
+    )
+    op.create_check_constraint(
+        "ck_ml_score_state_singleton", "ml_score_state", "singleton"
+    )
+    op.execute(
+        "INSERT INTO ml_score_state (id, max_score, active_version) "
+        "SELECT gen_random_uuid(), max(score), 0 FROM mlscores WHERE version = 0 "
+        "ON CONFLICT (singleton) DO NOTHING"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_ml_score_state_singleton", "ml_score_state", type_="check")
+    op.drop_constraint("uq_ml_score_state_singleton", "ml_score_state", type_="unique")
+    op.drop_column("ml_score_state", "singleton")
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from src.core.database import postgres_helper
+from src.api_v1.ads import crud as ads_crud
+
+BENCH_LOCATION = "benchmark_ml_scores"
+BENCH_PATTERN = BENCH_LOCATION + "\\_%"
+
+
+async def seed(clients: int, advertisers: int, campaigns: int) -> None:
+    async with postgres_helper.session_factory() as session:
+        await session.execute(
+            text(
+                "INSERT INTO clients (id, login, age, location, gender) "
+                "SELECT gen_random_uuid(), 'bench_' || i, 30, :location, 'MALE' "
+                "FROM generate_series(1, :clients) AS i"
+            ),
+            {"location": BENCH_LOCATION, "clients": clients},
+        )
+        await session.execute(
+            text(
+                "INSERT INTO advertisers (id, name) "
+                "SELECT gen_random_uuid(), :location || '_' || i "
+                "FROM generate_series(1, :advertisers) AS i"
+            ),
+            {"location": BENCH_LOCATION, "advertisers": advertisers},
+        )
+        await session.execute(
+            text(
+                "INSERT INTO mlscores (id, version, client_id, advertiser_id, score) "
+                "SELECT gen_random_uuid(), "
+                "(SELECT coalesce(max(active_version), 0) FROM ml_score_state), "
+                "clients.id, advertisers.id, floor(random() * 1000) "
+                "FROM clients CROSS JOIN advertisers "
+                "WHERE clients.location = :location "
+                "AND advertisers.name LIKE :pattern"
+            ),
+            {"location": BENCH_LOCATION, "pattern": BENCH_PATTERN},
+        )
+        await session.execute(
+            text(
+                "INSERT INTO campaigns (id, advertiser_id, impressions_limit, "
+                "clicks_limit, cost_per_impression, cost_per_click, ad_title, "
+                "ad_text, start_date, end_date, is_deleted) "
+                "SELECT gen_random_uuid(), id, 1000000000, 1000000000, "
+                "random(), random(), name, name, 0, 1000000, false "
+                "FROM advertisers WHERE name LIKE :pattern LIMIT :campaigns"
+            ),
+            {"pattern": BENCH_PATTERN, "campaigns": campaigns},
+        )
+        await session.execute(
+            text(
+                "INSERT INTO targetings (id, campaign_id, location) "
+                "SELECT gen_random_uuid(), campaigns.id, :location "
+                "FROM campaigns JOIN advertisers "
+                "ON advertisers.id = campaigns.advertiser_id "
+                "WHERE advertisers.name LIKE :pattern"
+            ),
+            {"location": BENCH_LOCATION, "pattern": BENCH_PATTERN},
+        )
+        await session.execute(
+            text(
+                'INSERT INTO "current_date" (id, "current_date") '
+                "SELECT gen_random_uuid(), 1 "
+                'WHERE NOT EXISTS (SELECT 1 FROM "current_date")'
+            )
+        )
+        if await session.scalar(text("SELECT to_regclass('ml_score_state')")):
+            await session.execute(
+                text(
+                    "UPDATE ml_score_state "
+                    "SET max_score = (SELECT max(score) FROM mlscores "
+                    "WHERE version = active_version)"
+                )
+            )
+        await session.commit()
+        await session.execute(text("ANALYZE"))
+
+
+async def measure(requests: int) -> list[float]:
+    async with postgres_helper.session_factory() as session:
+        result = await session.execute(
+            text("SELECT id FROM clients WHERE location = :location"),
+            {"location": BENCH_LOCATION},
+        )
+        client_ids = result.scalars().all()
+        ml_scores_count = await session.scalar(text("SELECT count(*) FROM mlscores"))
+    print(f"mlscores rows: {ml_scores_count}")
+
+    latencies = []
+    for _ in range(requests):
+        async with postgres_helper.session_factory() as session:
+            started = time.perf_counter()
+            await ads_crud.get_ad(client_id=random.choice(client_ids), session=session)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="GET /ads latency with a large mlscores table. "
+        "Run it against a dedicated database: it inserts benchmark data."
+    )
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--clients", type=int, default=1_000)
+    parser.add_argument("--advertisers", type=int, default=1_000)
+    parser.add_argument("--campaigns", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    if args.seed:
+        await seed(args.clients, args.advertisers, args.campaigns)
+
+    latencies = await measure(args.requests)
+    latencies.sort()
+    print(
+        f"get_ad latency over {len(latencies)} requests: "
+        f"mean={statistics.mean(latencies):.2f}ms "
+        f"p50={latencies[len(latencies) // 2]:.2f}ms "
+        f"p95={latencies[int(len(latencies) * 0.95)]:.2f}ms"
+    )
+    await postgres_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from src.core.database import postgres_helper
+from src.api_v1.ads import crud as ads_crud
+
+BENCH_LOCATION = "benchmark_clicks"
+
+
+async def seed(clients: int) -> None:
+    async with postgres_helper.session_factory() as session:
+        await session.execute(
+            text(
+                "INSERT INTO advertisers (id, name) "
+                "SELECT gen_random_uuid(), CAST(:location AS varchar) "
+                "WHERE NOT EXISTS (SELECT 1 FROM advertisers WHERE name = :location)"
+            ),
+            {"location": BENCH_LOCATION},
+        )
+        await session.execute(
+            text(
+                "INSERT INTO campaigns (id, advertiser_id, impressions_limit, "
+                "clicks_limit, cost_per_impression, cost_per_click, ad_title, "
+                "ad_text, start_date, end_date, is_deleted) "
+                "SELECT gen_random_uuid(), id, 1000000000, 1000000000, 0.1, 0.5, "
+                "name, name, 0, 1000000, false "
+                "FROM advertisers WHERE name = :location "
+                "AND NOT EXISTS (SELECT 1 FROM campaigns "
+                "WHERE campaigns.advertiser_id = advertisers.id)"
+            ),
+            {"location": BENCH_LOCATION},
+        )
+        await session.execute(
+            text(
+                'INSERT INTO "current_date" (id, "current_date") '
+                "SELECT gen_random_uuid(), 1 "
+                'WHERE NOT EXISTS (SELECT 1 FROM "current_date")'
+            )
+        )
+        await session.execute(
+            text(
+                "WITH new_clients AS ("
+                "INSERT INTO clients (id, login, age, location, gender) "
+                "SELECT gen_random_uuid(), 'bench_' || i, 30, CAST(:location AS varchar), 'MALE' "
+                "FROM generate_series(1, :clients) AS i RETURNING id) "
+                "INSERT INTO unique_impressions (id, client_id, campaign_id, date, cost) "
+                "SELECT gen_random_uuid(), new_clients.id, campaigns.id, 1, 0.1 "
+                "FROM new_clients CROSS JOIN campaigns "
+                "JOIN advertisers ON advertisers.id = campaigns.advertiser_id "
+                "WHERE advertisers.name = :location"
+            ),
+            {"location": BENCH_LOCATION, "clients": clients},
+        )
+        await session.commit()
+        await session.execute(text("ANALYZE"))
+
+
+async def measure(clicks: int) -> tuple[int, float]:
+    async with postgres_helper.session_factory() as session:
+        result = await session.execute(
+            text(
+                "SELECT unique_impressions.client_id, unique_impressions.campaign_id "
+                "FROM unique_impressions "
+                "JOIN clients ON clients.id = unique_impressions.client_id "
+                "WHERE clients.location = :location AND NOT EXISTS ("
+                "SELECT 1 FROM unique_clicks "
+                "WHERE unique_clicks.client_id = unique_impressions.client_id "
+                "AND unique_clicks.campaign_id = unique_impressions.campaign_id) "
+                "LIMIT :clicks"
+            ),
+            {"location": BENCH_LOCATION, "clicks": clicks},
+        )
+        pairs = result.all()
+
+    started = time.perf_counter()
+    for client_id, campaign_id in pairs:
+        async with postgres_helper.session_factory() as session:
+            await ads_crud.click_ad(
+                ad_id=campaign_id,
+                client_id=client_id,
+                session=session,
+            )
+    return len(pairs), time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Sequential POST /ads/{ad_id}/click throughput. "
+        "Run it against a dedicated database: it inserts benchmark data."
+    )
+    parser.add_argument("--seed", type=int, default=0, metavar="CLIENTS")
+    parser.add_argument("--clicks", type=int, default=2_000)
+    args = parser.parse_args()
+
+    if args.seed:
+        await seed(args.seed)
+
+    clicks, elapsed = await measure(args.clicks)
+    print(
+        f"click_ad: {clicks} clicks in {elapsed:.2f}s, "
+        f"{clicks / elapsed:.0f} clicks/s, {elapsed / clicks * 1000:.2f}ms/click"
+    )
+    await postgres_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
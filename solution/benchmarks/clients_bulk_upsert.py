@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from src.core.database import postgres_helper
+from src.api_v1.clients import crud as clients_crud, schemas as clients_schemas
+
+BENCH_LOCATION = "benchmark_clients"
+
+
+async def measure(clients: list[clients_schemas.ClientCreate]) -> float:
+    started = time.perf_counter()
+    async with postgres_helper.session_factory() as session:
+        await clients_crud.update_client(clients=clients, session=session)
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="POST /clients/bulk throughput for new and existing clients. "
+        "Run it against a dedicated database: it inserts benchmark data."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        clients = [
+            clients_schemas.ClientCreate(
+                client_id=uuid4(),
+                login=f"bench_{i}",
+                age=30,
+                location=BENCH_LOCATION,
+                gender="MALE",
+            )
+            for i in range(size)
+        ]
+        inserted = await measure(clients)
+        for client in clients:
+            client.age += 1
+        updated = await measure(clients)
+        print(
+            f"update_client x{size}: "
+            f"insert {inserted:.2f}s ({size / inserted:.0f} clients/s), "
+            f"update {updated:.2f}s ({size / updated:.0f} clients/s)"
+        )
+    await postgres_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,133 +1,90 @@
-from sqlalchemy import Integer
+from sqlalchemy import Integer, Uuid, exists, literal, true
 from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import select, func, and_, or_, desc, distinct, case
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.core.database import models
+from src.core.data import settings
+from src.core.database import postgres_helper, models
 from src.api_v1.ads import schemas as ads_schemas
 from src.api_v1.time import crud as time_crud
 from src.api_v1.clients import crud as clients_crud
+from src.api_v1.ml import crud as ml_crud
 from src.api_v1.campaigns import schemas as campaign_schemas
 from src.core.utils import enums
+from src.core.utils.campaign_index import campaign_index
+from src.core.utils.write_behind_buffer import WriteBehindBuffer
 from fastapi import HTTPException, status
-from uuid import UUID
+from uuid import UUID, uuid4
 
 
 async def get_ad(client_id: UUID, session: AsyncSession) -> ads_schemas.Ad:
-    client = await clients_crud.get_client(client_id=client_id, session=session)
+    client = await clients_crud.get_cached_client(client_id=client_id, session=session)
     current_date_result = await time_crud.get_current_date(session=session)
     current_day = current_date_result.current_date
 
-    max_ml_score_subquery = select(func.max(models.MLScore.score)).scalar_subquery()
-
-    is_impressioned_subquery = (
-        select(models.UniqueImpression.campaign_id)
-        .where(
-            models.UniqueImpression.client_id == client_id,
-            models.UniqueImpression.campaign_id == models.Campaign.campaign_id,
-        )
-        .correlate(models.Campaign)
-        .exists()
+    candidate_ids = await campaign_index.get_candidates(
+        gender=client.gender,
+        age=client.age,
+        location=client.location,
+        current_day=current_day,
+        session=session,
     )
-    is_clicked_subquery = (
-        select(models.UniqueClick.campaign_id)
-        .where(
-            models.UniqueClick.client_id == client_id,
-            models.UniqueClick.campaign_id == models.Campaign.campaign_id,
+    if not candidate_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No available ads matching targeting or limits reached",
         )
-        .correlate(models.Campaign)
-        .exists()
-    )
 
-    stmt = (
-        select(models.Campaign)
+    best_campaign = (
+        select(
+            models.Campaign.campaign_id,
+            models.Campaign.ad_title,
+            models.Campaign.ad_text,
+            models.Campaign.advertiser_id,
+            models.Campaign.cost_per_impression,
+        )
         .outerjoin(
             models.MLScore,
             and_(
                 models.MLScore.client_id == client_id,
                 models.MLScore.advertiser_id == models.Campaign.advertiser_id,
+                models.MLScore.version == ml_crud.get_active_ml_score_version(),
             ),
         )
         .outerjoin(
-            models.UniqueImpression,
-            and_(
-                models.UniqueImpression.client_id == client_id,
-                models.UniqueImpression.campaign_id == models.Campaign.campaign_id,
-            ),
-        )
-        .join(
-            models.Targeting,
-            models.Targeting.campaign_id == models.Campaign.campaign_id,
+            models.CampaignCounter,
+            models.CampaignCounter.campaign_id == models.Campaign.campaign_id,
         )
         .where(
-            and_(
-                models.Campaign.start_date <= current_day,
-                models.Campaign.end_date >= current_day,
-                models.Campaign.is_deleted == False,
-                or_(
-                    models.Targeting.gender.is_(None),
-                    models.Targeting.gender == client.gender,
-                    models.Targeting.gender == enums.ExtendedGenderEnum.ALL,
-                ),
-                and_(
-                    or_(
-                        models.Targeting.age_from.is_(None),
-                        models.Targeting.age_from <= client.age,
-                    ),
-                    or_(
-                        models.Targeting.age_to.is_(None),
-                        models.Targeting.age_to >= client.age,
-                    ),
-                ),
-                or_(
-                    models.Targeting.location.is_(None),
-                    models.Targeting.location == client.location,
-                ),
-                models.Campaign.clicks_limit
-                > (
-                    select(func.count(models.UniqueClick.campaign_id))
-                    .where(
-                        models.UniqueClick.campaign_id == models.Campaign.campaign_id
-                    )
-                    .correlate(models.Campaign)
-                ),
-                models.Campaign.impressions_limit
-                > (
-                    select(func.count(models.UniqueImpression.campaign_id))
-                    .where(
-                        models.UniqueImpression.campaign_id
-                        == models.Campaign.campaign_id
-                    )
-                    .correlate(models.Campaign)
-                ),
-            )
-        )
-        .order_by(
-            desc(
-                case(
-                    (is_impressioned_subquery, 0),
-                    else_=models.Campaign.cost_per_impression,
-                )
-                + (
-                    case(
-                        (is_clicked_subquery, 0),
-                        else_=models.Campaign.cost_per_click,
-                    )
-                    * case(
-                        (
-                            models.MLScore.score.isnot(None),
-                            models.MLScore.score / max_ml_score_subquery,
-                        ),
-                        else_=0,
-                    )
-                )
-            )
+            models.Campaign.campaign_id.in_(candidate_ids),
+            *get_ad_filters(current_day=current_day),
         )
+        .order_by(desc(get_ad_rank(client_id=client_id)))
         .limit(1)
     )
 
-    result = await session.execute(stmt)
-    best_campaign = result.scalar_one_or_none()
+    if settings.impression_write_behind:
+        result = await session.execute(best_campaign)
+        best_campaign = result.one_or_none()
+        if best_campaign:
+            await log_impression(
+                client_id=client_id,
+                campaign_id=best_campaign.campaign_id,
+                cost=best_campaign.cost_per_impression,
+                session=session,
+                current_date=current_day,
+            )
+    else:
+        result = await session.execute(
+            select_with_impression(
+                best_campaign=best_campaign.cte("best_campaign"),
+                client_id=client_id,
+                current_date=current_day,
+            )
+        )
+        best_campaign = result.one_or_none()
+        await session.commit()
 
     if not best_campaign:
         raise HTTPException(
@@ -135,14 +92,6 @@ async def get_ad(client_id: UUID, session: AsyncSession) -> ads_schemas.Ad:
             detail="No available ads matching targeting or limits reached",
         )
 
-    await log_impression(
-        client_id=client_id,
-        campaign_id=best_campaign.campaign_id,
-        cost=best_campaign.cost_per_impression,
-        session=session,
-        current_date=current_day,
-    )
-
     return ads_schemas.Ad(
         ad_id=best_campaign.campaign_id,
         ad_title=best_campaign.ad_title,
@@ -151,6 +100,217 @@ async def get_ad(client_id: UUID, session: AsyncSession) -> ads_schemas.Ad:
     )
 
 
+def select_with_impression(best_campaign, client_id: UUID, current_date: int):
+    inserted_impressions = (
+        insert(models.UniqueImpression)
+        .from_select(
+            ["id", "client_id", "campaign_id", "date", "cost"],
+            select(
+                literal(uuid4(), Uuid),
+                literal(client_id, Uuid),
+                best_campaign.c.campaign_id,
+                literal(current_date, Integer),
+                best_campaign.c.cost_per_impression,
+            ),
+        )
+        .on_conflict_do_nothing()
+        .returning(
+            models.UniqueImpression.client_id,
+            models.UniqueImpression.campaign_id,
+            models.UniqueImpression.date,
+            models.UniqueImpression.cost,
+        )
+        .cte("inserted_impressions")
+    )
+    return select(best_campaign).add_cte(
+        *increment_event_stats(
+            inserted_events=inserted_impressions,
+            count_key="impressions_count",
+            spent_key="spent_impressions",
+            sketch_key="impressions_sketch",
+        )
+    )
+
+
+def get_ad_filters(current_day: int) -> list:
+    return [
+        models.Campaign.start_date <= current_day,
+        models.Campaign.end_date >= current_day,
+        models.Campaign.is_deleted == False,
+        models.Campaign.clicks_limit
+        > func.coalesce(models.CampaignCounter.clicks_count, 0),
+        models.Campaign.impressions_limit
+        > func.coalesce(models.CampaignCounter.impressions_count, 0),
+    ]
+
+
+# no date predicate: start_date is mutable, so this probes every partition by index
+def get_is_impressioned(client_id):
+    return (
+        select(models.UniqueImpression.campaign_id)
+        .where(
+            models.UniqueImpression.client_id == client_id,
+            models.UniqueImpression.campaign_id == models.Campaign.campaign_id,
+        )
+        .correlate_except(models.UniqueImpression)
+        .exists()
+    )
+
+
+def get_ad_rank(client_id):
+    max_ml_score_subquery = select(models.MLScoreState.max_score).scalar_subquery()
+    is_clicked_subquery = (
+        select(models.UniqueClick.campaign_id)
+        .where(
+            models.UniqueClick.client_id == client_id,
+            models.UniqueClick.campaign_id == models.Campaign.campaign_id,
+        )
+        .correlate_except(models.UniqueClick)
+        .exists()
+    )
+    return case(
+        (get_is_impressioned(client_id=client_id), 0),
+        else_=models.Campaign.cost_per_impression,
+    ) + (
+        case(
+            (is_clicked_subquery, 0),
+            else_=models.Campaign.cost_per_click,
+        )
+        * case(
+            (
+                models.MLScore.score.isnot(None),
+                models.MLScore.score / max_ml_score_subquery,
+            ),
+            else_=0,
+        )
+    )
+
+
+async def get_ads(
+    client_ids: list[UUID],
+    session: AsyncSession,
+) -> list[ads_schemas.AdBatchItem]:
+    clients_result = await session.execute(
+        select(models.Client).where(models.Client.client_id.in_(client_ids))
+    )
+    clients = {client.client_id: client for client in clients_result.scalars().all()}
+    current_date_result = await time_crud.get_current_date(session=session)
+    current_day = current_date_result.current_date
+
+    pair_client_ids = []
+    pair_campaign_ids = []
+    for client in clients.values():
+        candidate_ids = await campaign_index.get_candidates(
+            gender=client.gender,
+            age=client.age,
+            location=client.location,
+            current_day=current_day,
+            session=session,
+        )
+        pair_client_ids.extend([client.client_id] * len(candidate_ids))
+        pair_campaign_ids.extend(candidate_ids)
+
+    ranked_campaigns = {}
+    impressions_left = {}
+    if pair_client_ids:
+        pairs = (
+            func.unnest(
+                literal(pair_client_ids, ARRAY(Uuid)),
+                literal(pair_campaign_ids, ARRAY(Uuid)),
+            )
+            .table_valued("client_id", "campaign_id")
+            .render_derived(name="pairs")
+        )
+        stmt = (
+            select(
+                pairs.c.client_id,
+                models.Campaign.campaign_id,
+                models.Campaign.advertiser_id,
+                models.Campaign.ad_title,
+                models.Campaign.ad_text,
+                models.Campaign.cost_per_impression,
+                (
+                    models.Campaign.impressions_limit
+                    - func.coalesce(models.CampaignCounter.impressions_count, 0)
+                ).label("impressions_left"),
+                get_is_impressioned(client_id=pairs.c.client_id).label(
+                    "is_impressioned"
+                ),
+                get_ad_rank(client_id=pairs.c.client_id).label("rank"),
+            )
+            .join(
+                models.Campaign,
+                models.Campaign.campaign_id == pairs.c.campaign_id,
+            )
+            .outerjoin(
+                models.MLScore,
+                and_(
+                    models.MLScore.client_id == pairs.c.client_id,
+                    models.MLScore.advertiser_id == models.Campaign.advertiser_id,
+                    models.MLScore.version == ml_crud.get_active_ml_score_version(),
+                ),
+            )
+            .outerjoin(
+                models.CampaignCounter,
+                models.CampaignCounter.campaign_id == models.Campaign.campaign_id,
+            )
+            .where(*get_ad_filters(current_day=current_day))
+        )
+        result = await session.execute(stmt)
+        for row in result.all():
+            ranked_campaigns.setdefault(row.client_id, []).append(row)
+            impressions_left[row.campaign_id] = row.impressions_left
+
+    impressions = []
+    shown = set()
+    ads = []
+    for client_id in client_ids:
+        best_campaign = None
+        best_rank = None
+        for campaign in ranked_campaigns.get(client_id, []):
+            if impressions_left[campaign.campaign_id] <= 0:
+                continue
+            rank = campaign.rank
+            if (
+                not campaign.is_impressioned
+                and (client_id, campaign.campaign_id) in shown
+            ):
+                rank -= campaign.cost_per_impression
+            if best_campaign is None or rank > best_rank:
+                best_campaign = campaign
+                best_rank = rank
+
+        if best_campaign is None:
+            ads.append(ads_schemas.AdBatchItem(client_id=client_id, ad=None))
+            continue
+
+        impressions_left[best_campaign.campaign_id] -= 1
+        shown.add((client_id, best_campaign.campaign_id))
+        impressions.append(
+            {
+                "client_id": client_id,
+                "campaign_id": best_campaign.campaign_id,
+                "date": current_day,
+                "cost": best_campaign.cost_per_impression,
+            }
+        )
+        ads.append(
+            ads_schemas.AdBatchItem(
+                client_id=client_id,
+                ad=ads_schemas.Ad(
+                    ad_id=best_campaign.campaign_id,
+                    ad_title=best_campaign.ad_title,
+                    ad_text=best_campaign.ad_text,
+                    advertiser_id=best_campaign.advertiser_id,
+                ),
+            )
+        )
+
+    if impressions:
+        await log_impressions(impressions=impressions, session=session)
+    return ads
+
+
 async def log_impression(
     client_id: UUID,
     campaign_id: UUID,
@@ -158,57 +318,208 @@ async def log_impression(
     session: AsyncSession,
     current_date: int,
 ):
-    stmt = (
+    await log_impressions(
+        impressions=[
+            {
+                "client_id": client_id,
+                "campaign_id": campaign_id,
+                "date": current_date,
+                "cost": cost,
+            }
+        ],
+        session=session,
+    )
+
+
+async def log_impressions(impressions: list[dict], session: AsyncSession):
+    if settings.impression_write_behind:
+        for impression in impressions:
+            await impression_buffer.add(
+                key=(impression["client_id"], impression["campaign_id"]),
+                item=impression,
+            )
+        return
+    await write_impressions(impressions=impressions, session=session)
+
+
+async def write_impressions(impressions: list[dict], session: AsyncSession):
+    inserted_impressions = (
         insert(models.UniqueImpression)
-        .values(
-            client_id=client_id,
-            campaign_id=campaign_id,
-            date=current_date,
-            cost=cost,
-        )
+        # the id default is sent as NULL once several insert CTEs are attached
+        .values([{"id": uuid4(), **impression} for impression in impressions])
         .on_conflict_do_nothing()
+        .returning(
+            models.UniqueImpression.client_id,
+            models.UniqueImpression.campaign_id,
+            models.UniqueImpression.date,
+            models.UniqueImpression.cost,
+        )
+        .cte("inserted_impressions")
+    )
+    await session.execute(
+        select(func.count())
+        .select_from(inserted_impressions)
+        .add_cte(
+            *increment_event_stats(
+                inserted_events=inserted_impressions,
+                count_key="impressions_count",
+                spent_key="spent_impressions",
+                sketch_key="impressions_sketch",
+            )
+        )
     )
-    await session.execute(stmt)
     await session.commit()
 
 
-async def click_ad(ad_id: UUID, client_id: UUID, session: AsyncSession) -> None:
-    client = await clients_crud.get_client(client_id=client_id, session=session)
-    campaign = await session.execute(
-        select(models.Campaign).where(
-            models.Campaign.campaign_id == ad_id, models.Campaign.is_deleted == False
+async def flush_impressions(impressions: list[dict]):
+    async with postgres_helper.session_factory() as session:
+        await write_impressions(impressions=impressions, session=session)
+
+
+impression_buffer = WriteBehindBuffer(
+    flush=flush_impressions,
+    batch_size=settings.impression_flush_batch_size,
+    flush_interval=settings.impression_flush_interval,
+    max_size=settings.impression_buffer_max_size,
+    retry_interval=settings.impression_flush_retry_interval,
+    max_retry_interval=settings.impression_flush_max_retry_interval,
+    block_when_full=settings.impression_buffer_block_when_full,
+    data_errors=(DataError, IntegrityError),
+)
+
+
+def increment_event_stats(
+    inserted_events, count_key: str, spent_key: str, sketch_key: str
+) -> list:
+    campaign_id = inserted_events.c.campaign_id
+    date = inserted_events.c.date
+    return [
+        increment_stats(
+            model=models.CampaignCounter,
+            group_by={"campaign_id": campaign_id},
+            inserted_events=inserted_events,
+            count_key=count_key,
+            spent_key=spent_key,
+        ).cte("updated_campaign_counters"),
+        increment_stats(
+            model=models.CampaignDailyStat,
+            group_by={"campaign_id": campaign_id, "date": date},
+            inserted_events=inserted_events,
+            count_key=count_key,
+            spent_key=spent_key,
+        ).cte("updated_campaign_daily_stats"),
+        increment_stats(
+            model=models.AdvertiserDailyStat,
+            group_by={"advertiser_id": models.Campaign.advertiser_id, "date": date},
+            source=inserted_events.join(
+                models.Campaign,
+                models.Campaign.campaign_id == campaign_id,
+            ),
+            inserted_events=inserted_events,
+            count_key=count_key,
+            spent_key=spent_key,
+        ).cte("updated_advertiser_daily_stats"),
+        increment_sketches(
+            inserted_events=inserted_events,
+            sketch_key=sketch_key,
+        ).cte("updated_campaign_daily_reach"),
+    ]
+
+
+def increment_stats(
+    model, group_by: dict, inserted_events, count_key, spent_key, source=None
+):
+    stmt = insert(model).from_select(
+        [*group_by, count_key, spent_key],
+        select(
+            *group_by.values(),
+            func.count(),
+            func.sum(inserted_events.c.cost),
         )
+        .select_from(inserted_events if source is None else source)
+        .group_by(*group_by.values()),
+    )
+    columns = model.__table__.c
+    return stmt.on_conflict_do_update(
+        index_elements=list(group_by),
+        set_={
+            count_key: columns[count_key] + stmt.excluded[count_key],
+            spent_key: columns[spent_key] + stmt.excluded[spent_key],
+        },
     )
-    campaign = campaign.scalar_one_or_none()
-    if not campaign:
-        return
 
-    unique_click = await session.execute(
-        select(models.UniqueClick).where(
-            models.UniqueClick.client_id == client.client_id,
-            models.UniqueClick.campaign_id == campaign.campaign_id,
-        )
+
+def increment_sketches(inserted_events, sketch_key: str):
+    group_by = [inserted_events.c.campaign_id, inserted_events.c.date]
+    stmt = insert(models.CampaignDailyReach).from_select(
+        ["campaign_id", "date", sketch_key],
+        select(*group_by, func.hll_agg(inserted_events.c.client_id)).group_by(
+            *group_by
+        ),
     )
-    impression = await session.execute(
-        select(models.UniqueImpression).where(
-            models.UniqueImpression.client_id == client.client_id,
-            models.UniqueImpression.campaign_id == campaign.campaign_id,
-        )
+    return stmt.on_conflict_do_update(
+        index_elements=["campaign_id", "date"],
+        set_={
+            sketch_key: func.hll_merge(
+                models.CampaignDailyReach.__table__.c[sketch_key],
+                stmt.excluded[sketch_key],
+            )
+        },
     )
-    impression = impression.scalars().all()
-    if not impression:
-        return
-    unique_click = unique_click.scalar_one_or_none()
-    if unique_click:
-        return
 
-    current_date = await time_crud.get_current_date(session=session)
-    session.add(
-        models.UniqueClick(
-            client_id=client.client_id,
-            campaign_id=campaign.campaign_id,
-            date=current_date.current_date,
-            cost=campaign.cost_per_click,
+
+async def click_ad(ad_id: UUID, client_id: UUID, session: AsyncSession) -> None:
+    if (client_id, ad_id) in impression_buffer:
+        await impression_buffer.flush()
+
+    inserted_clicks = (
+        insert(models.UniqueClick)
+        .from_select(
+            ["id", "client_id", "campaign_id", "date", "cost"],
+            select(
+                literal(uuid4(), Uuid),
+                literal(client_id, Uuid),
+                models.Campaign.campaign_id,
+                models.CurrentDate.current_date,
+                models.Campaign.cost_per_click,
+            )
+            .select_from(models.Campaign)
+            .join(models.CurrentDate, true())
+            .where(
+                models.Campaign.campaign_id == ad_id,
+                models.Campaign.is_deleted == False,
+                exists().where(
+                    models.UniqueImpression.client_id == client_id,
+                    models.UniqueImpression.campaign_id == ad_id,
+                ),
+                ~exists().where(
+                    models.UniqueClick.client_id == client_id,
+                    models.UniqueClick.campaign_id == ad_id,
+                ),
+            )
+            .limit(1),
+        )
+        .on_conflict_do_nothing()
+        .returning(
+            models.UniqueClick.client_id,
+            models.UniqueClick.campaign_id,
+            models.UniqueClick.date,
+            models.UniqueClick.cost,
         )
+        .cte("inserted_clicks")
     )
+    result = await session.execute(
+        select(inserted_clicks.c.campaign_id).add_cte(
+            *increment_event_stats(
+                inserted_events=inserted_clicks,
+                count_key="clicks_count",
+                spent_key="spent_clicks",
+                sketch_key="clicks_sketch",
+            )
+        )
+    )
+    clicked = result.scalar_one_or_none()
     await session.commit()
+
+    if clicked is None:
+        await clients_crud.get_cached_client(client_id=client_id, session=session)
@@ -22,6 +22,17 @@ async def get_ad(
     )
 
 
+@router.post("/batch")
+async def get_ads(
+    batch_in: ads_schemas.AdBatchRequest,
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> list[ads_schemas.AdBatchItem]:
+    return await ads_crud.get_ads(
+        client_ids=batch_in.client_ids,
+        session=session,
+    )
+
+
 @router.post(
     "/{ad_id}/click",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 
 
 class AdBase(BaseModel):
@@ -14,3 +14,12 @@ class AdBase(BaseModel):
 
 
 class Ad(AdBase): ...
+
+
+class AdBatchRequest(BaseModel):
+    client_ids: list[UUID] = Field(..., min_length=1, max_length=1000)
+
+
+class AdBatchItem(BaseModel):
+    client_id: UUID
+    ad: Ad | None = None
@@ -1,6 +1,7 @@
 from uuid import UUID
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import update, select
+from sqlalchemy import String, Uuid, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.database import postgres_helper, models
 from src.api_v1.advertisers import schemas as advertisers_schemas
@@ -33,25 +34,38 @@ async def update_advertiser(
     advertisers: list[advertisers_schemas.AdvertiserCreate],
     session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
 ) -> list[advertisers_schemas.Advertiser]:
-    updated_advertisers = []
-    for advertiser_data in advertisers:
-        advertiser = await session.get(models.Advertiser, advertiser_data.advertiser_id)
-        if advertiser:
-            await session.execute(
-                update(models.Advertiser)
-                .where(models.Advertiser.advertiser_id == advertiser_data.advertiser_id)
-                .values(name=advertiser_data.name)
-            )
-            await session.refresh(advertiser)
-            updated_advertisers.append(
-                advertisers_schemas.Advertiser.model_validate(advertiser)
-            )
-        else:
-            new_advertiser = models.Advertiser(**advertiser_data.model_dump())
-            session.add(new_advertiser)
-            await session.flush()
-            updated_advertisers.append(
-                advertisers_schemas.Advertiser.model_validate(new_advertiser)
-            )
+    advertisers_data = list(
+        {advertiser.advertiser_id: advertiser for advertiser in advertisers}.values()
+    )
+    advertiser_rows = (
+        func.unnest(
+            literal(
+                [advertiser.advertiser_id for advertiser in advertisers_data],
+                ARRAY(Uuid),
+            ),
+            literal(
+                [advertiser.name for advertiser in advertisers_data],
+                ARRAY(String),
+            ),
+        )
+        .table_valued("advertiser_id", "name")
+        .render_derived(name="advertiser_rows")
+    )
+    stmt = insert(models.Advertiser).from_select(
+        [models.Advertiser.advertiser_id, models.Advertiser.name],
+        select(advertiser_rows.c.advertiser_id, advertiser_rows.c.name),
+    )
+    result = await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[models.Advertiser.advertiser_id],
+            set_={"name": stmt.excluded.name},
+        ).returning(models.Advertiser.advertiser_id, models.Advertiser.name)
+    )
+    updated_advertisers = {
+        advertiser.advertiser_id: advertisers_schemas.Advertiser.model_validate(
+            advertiser
+        )
+        for advertiser in result.all()
+    }
     await session.commit()
-    return updated_advertisers
+    return [updated_advertisers[advertiser.advertiser_id] for advertiser in advertisers]
@@ -8,6 +8,7 @@ from sqlalchemy.orm import selectinload
 from src.core.database import postgres_helper, models
 from src.api_v1.campaigns import schemas as campaigns_schemas
 from src.api_v1.advertisers import crud as advertisers_crud
+from src.core.utils.campaign_index import campaign_index
 
 
 async def get_campaign_by_id(
@@ -85,6 +86,7 @@ async def create_campaign(
 
     session.add(campaign)
     await session.commit()
+    campaign_index.invalidate()
     await session.refresh(campaign)
 
     query = (
@@ -139,6 +141,7 @@ async def update_campaign(
         else:
             campaign.targeting = models.Targeting(**targeting_update_data)
     await session.commit()
+    campaign_index.invalidate()
     await session.refresh(campaign)
     return campaigns_schemas.Campaign.model_validate(campaign)
 
@@ -156,3 +159,4 @@ async def delete_campaign(
         )
     campaign.is_deleted = True
     await session.commit()
+    campaign_index.invalidate()
@@ -1,9 +1,33 @@
+from typing import AsyncIterator
 from uuid import UUID
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import update, select
+from sqlalchemy import (
+    Integer,
+    String,
+    Uuid,
+    cast,
+    column,
+    func,
+    literal,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.data import settings
 from src.core.database import postgres_helper, models
 from src.api_v1.clients import schemas as clients_schemas
+from src.core.utils import enums
+from src.core.utils.stream_import import ImportReport, parse_records, validate_batches
+from src.core.utils.ttl_cache import TTLCache
+
+CLIENTS_STAGING_TABLE = "clients_staging"
+
+client_cache = TTLCache(
+    maxsize=settings.client_cache_size,
+    ttl=settings.client_cache_ttl,
+)
 
 
 async def get_clients(
@@ -29,30 +53,144 @@ async def get_client(
     return clients_schemas.Client.model_validate(client)
 
 
+async def get_cached_client(
+    client_id: UUID,
+    session: AsyncSession,
+) -> clients_schemas.Client:
+    cached_client = client_cache.get(client_id)
+    if cached_client is not None:
+        return cached_client
+    client = await get_client(client_id=client_id, session=session)
+    client_cache.set(client_id, client)
+    return client
+
+
 async def update_client(
     clients: list[clients_schemas.ClientCreate],
     session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
 ) -> list[clients_schemas.Client]:
-    updated_clients = []
-    for client_data in clients:
-        client = await session.get(models.Client, client_data.client_id)
-        if client:
-            await session.execute(
-                update(models.Client)
-                .where(models.Client.client_id == client_data.client_id)
-                .values(
-                    login=client_data.login,
-                    age=client_data.age,
-                    location=client_data.location,
-                    gender=client_data.gender,
+    clients_data = list({client.client_id: client for client in clients}.values())
+    updated_clients = {}
+    for offset in range(0, len(clients_data), settings.clients_upsert_chunk_size):
+        chunk = clients_data[offset : offset + settings.clients_upsert_chunk_size]
+        client_rows = (
+            func.unnest(
+                literal([client.client_id for client in chunk], ARRAY(Uuid)),
+                literal([client.login for client in chunk], ARRAY(String)),
+                literal([client.age for client in chunk], ARRAY(Integer)),
+                literal([client.location for client in chunk], ARRAY(String)),
+                literal([client.gender.name for client in chunk], ARRAY(String)),
+            )
+            .table_valued("client_id", "login", "age", "location", "gender")
+            .render_derived(name="client_rows")
+        )
+        result = await session.execute(
+            get_upsert_clients_stmt(
+                select(
+                    client_rows.c.client_id,
+                    client_rows.c.login,
+                    client_rows.c.age,
+                    client_rows.c.location,
+                    cast(client_rows.c.gender, models.Client.gender.type),
                 )
+            ).returning(
+                models.Client.client_id,
+                models.Client.login,
+                models.Client.age,
+                models.Client.location,
+                models.Client.gender,
+            )
+        )
+        for client in result.all():
+            updated_clients[client.client_id] = clients_schemas.Client.model_validate(
+                client
             )
-            await session.refresh(client)
-            updated_clients.append(clients_schemas.Client.model_validate(client))
-        else:
-            new_client = models.Client(**client_data.model_dump())
-            session.add(new_client)
-            await session.flush()
-            updated_clients.append(clients_schemas.Client.model_validate(new_client))
     await session.commit()
-    return updated_clients
+    for client_id in updated_clients:
+        client_cache.invalidate(client_id)
+    return [updated_clients[client.client_id] for client in clients]
+
+
+async def upload_clients(
+    chunks: AsyncIterator[bytes],
+    import_format: enums.ExportFormatEnum,
+    session: AsyncSession,
+) -> ImportReport:
+    await session.execute(
+        text(
+            f"CREATE TEMP TABLE {CLIENTS_STAGING_TABLE} ON COMMIT DROP AS "
+            "SELECT 0::bigint AS row_number, * FROM clients WITH NO DATA"
+        )
+    )
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    report = ImportReport()
+    async for batch in validate_batches(
+        records=parse_records(chunks=chunks, import_format=import_format),
+        schema=clients_schemas.ClientCreate,
+        batch_size=settings.clients_upload_batch_size,
+        max_errors=settings.clients_upload_max_errors,
+        report=report,
+    ):
+        async with raw_connection.driver_connection.cursor() as cursor:
+            async with cursor.copy(
+                f"COPY {CLIENTS_STAGING_TABLE} "
+                "(row_number, id, login, age, location, gender) FROM STDIN"
+            ) as copy:
+                for row, client in batch:
+                    await copy.write_row(
+                        (
+                            row,
+                            client.client_id,
+                            client.login,
+                            client.age,
+                            client.location,
+                            client.gender.name,
+                        )
+                    )
+
+    staging = table(
+        CLIENTS_STAGING_TABLE,
+        column("row_number"),
+        column("id"),
+        column("login"),
+        column("age"),
+        column("location"),
+        column("gender"),
+    )
+    await session.execute(
+        get_upsert_clients_stmt(
+            select(
+                staging.c.id,
+                staging.c.login,
+                staging.c.age,
+                staging.c.location,
+                staging.c.gender,
+            )
+            .distinct(staging.c.id)
+            .order_by(staging.c.id, staging.c.row_number.desc())
+        )
+    )
+    await session.commit()
+    client_cache.clear()
+    return report
+
+
+def get_upsert_clients_stmt(client_rows):
+    stmt = insert(models.Client).from_select(
+        [
+            models.Client.client_id,
+            models.Client.login,
+            models.Client.age,
+            models.Client.location,
+            models.Client.gender,
+        ],
+        client_rows,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[models.Client.client_id],
+        set_={
+            column: stmt.excluded[column]
+            for column in ("login", "age", "location", "gender")
+        },
+    )
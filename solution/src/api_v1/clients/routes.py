@@ -1,10 +1,12 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import postgres_helper
 from src.api_v1.clients import schemas as clients_schemas, crud as clients_crud
+from src.core.utils import enums
+from src.core.utils.stream_import import ImportReport
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
@@ -39,3 +41,21 @@ async def create_client(
         clients=clients,
         session=session,
     )
+
+
+@router.post(
+    "/upload",
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_clients(
+    request: Request,
+    import_format: enums.ExportFormatEnum = Query(
+        enums.ExportFormatEnum.NDJSON, alias="format"
+    ),
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> ImportReport:
+    return await clients_crud.upload_clients(
+        chunks=request.stream(),
+        import_format=import_format,
+        session=session,
+    )
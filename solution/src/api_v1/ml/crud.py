@@ -1,12 +1,55 @@
-from uuid import UUID
+import logging
+from typing import AsyncIterator
+from uuid import UUID, uuid4
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import (
+    and_,
+    column,
+    exists,
+    literal,
+    or_,
+    select,
+    func,
+    table,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.data import settings
 from src.core.database import postgres_helper, models
 
 from src.api_v1.ml import schemas as ml_schemas
 from src.api_v1.clients import crud as clients_crud
 from src.api_v1.advertisers import crud as advertisers_crud
+from src.core.utils import enums
+from src.core.utils.stream_import import (
+    ImportReport,
+    RowError,
+    parse_records,
+    validate_batches,
+)
+
+ML_SCORES_STAGING_TABLE = "ml_scores_staging"
+ML_SCORE_VERSION_SEQUENCE = "mlscores_version_seq"
+LOCK_NOT_AVAILABLE = "55P03"
+
+ml_scores_staging = table(
+    ML_SCORES_STAGING_TABLE,
+    column("row_number"),
+    column("client_id"),
+    column("advertiser_id"),
+    column("score"),
+)
+staged_client_exists = exists().where(
+    models.Client.client_id == ml_scores_staging.c.client_id
+)
+staged_advertiser_exists = exists().where(
+    models.Advertiser.advertiser_id == ml_scores_staging.c.advertiser_id
+)
+
+logger = logging.getLogger(__name__)
 
 
 async def get_ml_score(
@@ -17,6 +60,7 @@ async def get_ml_score(
     query = select(models.MLScore).where(
         models.MLScore.client_id == client_id,
         models.MLScore.advertiser_id == advertiser_id,
+        models.MLScore.version == get_active_ml_score_version(),
     )
     result = await session.execute(query)
     ml_score = result.scalar_one_or_none()
@@ -41,20 +85,446 @@ async def update_ml_score(
         advertiser_id=ml_score_in.advertiser_id,
         session=session,
     )
+    previous_score = await session.scalar(
+        select(models.MLScore.score).where(
+            models.MLScore.client_id == ml_score_in.client_id,
+            models.MLScore.advertiser_id == ml_score_in.advertiser_id,
+            models.MLScore.version == get_active_ml_score_version(),
+        )
+    )
+    ml_score_state = await lock_ml_score_state(
+        session=session,
+        shared=not await may_lower_max_ml_score(
+            previous_score=previous_score,
+            score=ml_score_in.score,
+            session=session,
+        ),
+    )
     query = select(models.MLScore).where(
         models.MLScore.client_id == ml_score_in.client_id,
         models.MLScore.advertiser_id == ml_score_in.advertiser_id,
+        models.MLScore.version == ml_score_state.active_version,
     )
     result = await session.execute(query)
     ml_score = result.scalar_one_or_none()
+    previous_score = None
     if ml_score:
+        previous_score = ml_score.score
         ml_score.score = ml_score_in.score
-        await session.commit()
-        await session.refresh(ml_score)
     else:
-        new_ml_score = models.MLScore(**ml_score_in.model_dump())
-        session.add(new_ml_score)
-        await session.commit()
-        await session.refresh(new_ml_score)
-        ml_score = new_ml_score
+        ml_score = models.MLScore(
+            **ml_score_in.model_dump(),
+            version=ml_score_state.active_version,
+        )
+        session.add(ml_score)
+    await session.flush()
+    await update_max_ml_score(
+        ml_score_state=ml_score_state,
+        previous_score=previous_score,
+        score=ml_score_in.score,
+        session=session,
+    )
+    await session.commit()
+    await session.refresh(ml_score)
     return ml_schemas.MLScore.model_validate(ml_score)
+
+
+async def upload_ml_scores(
+    chunks: AsyncIterator[bytes],
+    import_format: enums.ExportFormatEnum,
+    session: AsyncSession,
+) -> ImportReport:
+    report = await stage_ml_scores(
+        chunks=chunks,
+        import_format=import_format,
+        session=session,
+    )
+    valid_scores = get_valid_staged_scores().cte("valid_scores")
+    previous_score_query = select(func.max(models.MLScore.score)).join(
+        valid_scores,
+        and_(
+            valid_scores.c.client_id == models.MLScore.client_id,
+            valid_scores.c.advertiser_id == models.MLScore.advertiser_id,
+        ),
+    )
+    ml_score_state = await lock_ml_score_state(
+        session=session,
+        shared=not await may_lower_max_ml_score(
+            previous_score=await session.scalar(
+                previous_score_query.where(
+                    models.MLScore.version == get_active_ml_score_version()
+                )
+            ),
+            score=None,
+            session=session,
+        ),
+    )
+    previous_score = await session.scalar(
+        previous_score_query.where(
+            models.MLScore.version == ml_score_state.active_version
+        )
+    )
+    stmt = insert(models.MLScore).from_select(
+        ["id", "version", "client_id", "advertiser_id", "score"],
+        select(
+            func.gen_random_uuid(),
+            literal(ml_score_state.active_version),
+            valid_scores.c.client_id,
+            valid_scores.c.advertiser_id,
+            valid_scores.c.score,
+        ),
+    )
+    upserted_scores = (
+        stmt.on_conflict_do_update(
+            constraint="uix_client_advertiser",
+            set_={"score": stmt.excluded.score},
+        )
+        .returning(models.MLScore.score)
+        .cte("upserted_scores")
+    )
+    score = await session.scalar(select(func.max(upserted_scores.c.score)))
+    if score is not None:
+        await update_max_ml_score(
+            ml_score_state=ml_score_state,
+            previous_score=previous_score,
+            score=score,
+            session=session,
+        )
+    await session.commit()
+    return report
+
+
+async def publish_ml_score_snapshot(
+    chunks: AsyncIterator[bytes],
+    import_format: enums.ExportFormatEnum,
+    session: AsyncSession,
+) -> ml_schemas.MLScoreSnapshotReport:
+    report = await stage_ml_scores(
+        chunks=chunks,
+        import_format=import_format,
+        session=session,
+    )
+    if not report.rows_loaded:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ML score snapshot has no valid rows",
+        )
+    version = await session.scalar(select(func.nextval(ML_SCORE_VERSION_SEQUENCE)))
+    partition = get_ml_score_partition(version=version)
+    max_score = await load_ml_score_partition(
+        partition=partition,
+        version=version,
+        session=session,
+    )
+    await session.commit()
+    try:
+        for column_name, referred_table in (
+            ("client_id", models.Client.__tablename__),
+            ("advertiser_id", models.Advertiser.__tablename__),
+        ):
+            await session.execute(
+                text(
+                    f"ALTER TABLE {partition} ADD CONSTRAINT "
+                    f"{partition}_{column_name}_fkey FOREIGN KEY ({column_name}) "
+                    f"REFERENCES {referred_table} (id) NOT VALID"
+                )
+            )
+        await session.commit()
+        for column_name in ("client_id", "advertiser_id"):
+            await session.execute(
+                text(
+                    f"ALTER TABLE {partition} "
+                    f"VALIDATE CONSTRAINT {partition}_{column_name}_fkey"
+                )
+            )
+        await session.commit()
+
+        await activate_ml_score_partition(
+            partition=partition,
+            version=version,
+            max_score=max_score,
+            session=session,
+        )
+    except Exception:
+        await session.rollback()
+        await session.execute(text(f"DROP TABLE IF EXISTS {partition}"))
+        await session.commit()
+        raise
+    await drop_inactive_ml_score_versions()
+    return ml_schemas.MLScoreSnapshotReport(
+        **report.model_dump(),
+        version=version,
+    )
+
+
+async def activate_ml_score_partition(
+    partition: str, version: int, max_score: float | None, session: AsyncSession
+) -> None:
+    for attempt in range(settings.ml_scores_snapshot_attach_attempts):
+        try:
+            await session.execute(
+                text(
+                    "SET LOCAL lock_timeout = "
+                    f"{settings.ml_scores_snapshot_lock_timeout_ms}"
+                )
+            )
+            ml_score_state = await lock_ml_score_state(session=session)
+            if ml_score_state.active_version > version:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A newer ML score snapshot is already active",
+                )
+            await session.execute(
+                text(
+                    f"ALTER TABLE {models.MLScore.__tablename__} "
+                    f"ATTACH PARTITION {partition} FOR VALUES IN ({version})"
+                )
+            )
+            ml_score_state.active_version = version
+            ml_score_state.max_score = max_score
+            await session.commit()
+            return
+        except DBAPIError as exc:
+            await session.rollback()
+            if (
+                getattr(exc.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE
+                or attempt + 1 == settings.ml_scores_snapshot_attach_attempts
+            ):
+                raise
+            logger.warning("ML score partition %s attach timed out", partition)
+
+
+async def load_ml_score_partition(
+    partition: str, version: int, session: AsyncSession
+) -> float | None:
+    await session.execute(
+        text(
+            f"CREATE TABLE {partition} (LIKE {models.MLScore.__tablename__} "
+            f"INCLUDING DEFAULTS, CHECK (version = {version}))"
+        )
+    )
+    valid_scores = get_valid_staged_scores().subquery("valid_scores")
+    await session.execute(
+        insert(
+            table(
+                partition,
+                column("id"),
+                column("version"),
+                column("client_id"),
+                column("advertiser_id"),
+                column("score"),
+            )
+        ).from_select(
+            ["id", "version", "client_id", "advertiser_id", "score"],
+            select(
+                func.gen_random_uuid(),
+                literal(version),
+                valid_scores.c.client_id,
+                valid_scores.c.advertiser_id,
+                valid_scores.c.score,
+            ),
+        )
+    )
+    await session.execute(
+        text(
+            f"ALTER TABLE {partition} "
+            f"ADD CONSTRAINT {partition}_pkey PRIMARY KEY (id, version), "
+            f"ADD CONSTRAINT {partition}_version_client_id_advertiser_id_key "
+            "UNIQUE (version, client_id, advertiser_id)"
+        )
+    )
+    return await session.scalar(select(func.max(valid_scores.c.score)))
+
+
+async def drop_inactive_ml_score_versions() -> None:
+    async with postgres_helper.engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        active_version = await connection.scalar(
+            select(models.MLScoreState.active_version)
+        )
+        if active_version is None:
+            return
+        result = await connection.execute(
+            text(
+                "SELECT pg_class.relname, pg_inherits.inhdetachpending "
+                "FROM pg_class LEFT JOIN pg_inherits "
+                "ON pg_inherits.inhrelid = pg_class.oid "
+                "WHERE pg_class.relkind = 'r' "
+                "AND pg_class.relnamespace = 'public'::regnamespace "
+                "AND pg_class.relname ~ :pattern"
+            ),
+            {"pattern": f"^{models.MLScore.__tablename__}_v[0-9]+$"},
+        )
+        for partition, detach_pending in result.all():
+            version = int(partition.rsplit("_v", 1)[1])
+            if version >= active_version:
+                continue
+            try:
+                if detach_pending is not None:
+                    detach_mode = "FINALIZE" if detach_pending else "CONCURRENTLY"
+                    await connection.execute(
+                        text(
+                            f"ALTER TABLE {models.MLScore.__tablename__} "
+                            f"DETACH PARTITION {partition} {detach_mode}"
+                        )
+                    )
+                await connection.execute(text(f"DROP TABLE {partition}"))
+            except DBAPIError:
+                logger.warning(
+                    "Could not drop ML score partition %s", partition, exc_info=True
+                )
+
+
+def get_ml_score_partition(version: int) -> str:
+    return f"{models.MLScore.__tablename__}_v{version}"
+
+
+async def stage_ml_scores(
+    chunks: AsyncIterator[bytes],
+    import_format: enums.ExportFormatEnum,
+    session: AsyncSession,
+) -> ImportReport:
+    await session.execute(
+        text(
+            f"CREATE TEMP TABLE {ML_SCORES_STAGING_TABLE} ("
+            "row_number bigint, client_id uuid, advertiser_id uuid, "
+            "score double precision) ON COMMIT DROP"
+        )
+    )
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    report = ImportReport()
+    async for batch in validate_batches(
+        records=parse_records(chunks=chunks, import_format=import_format),
+        schema=ml_schemas.MLScoreCreate,
+        batch_size=settings.ml_scores_upload_batch_size,
+        max_errors=settings.ml_scores_upload_max_errors,
+        report=report,
+    ):
+        async with raw_connection.driver_connection.cursor() as cursor:
+            async with cursor.copy(
+                f"COPY {ML_SCORES_STAGING_TABLE} "
+                "(row_number, client_id, advertiser_id, score) FROM STDIN"
+            ) as copy:
+                for row, ml_score in batch:
+                    await copy.write_row(
+                        (
+                            row,
+                            ml_score.client_id,
+                            ml_score.advertiser_id,
+                            ml_score.score,
+                        )
+                    )
+    await report_missing_references(report=report, session=session)
+    return report
+
+
+def get_valid_staged_scores():
+    return (
+        select(
+            ml_scores_staging.c.client_id,
+            ml_scores_staging.c.advertiser_id,
+            ml_scores_staging.c.score,
+        )
+        .where(staged_client_exists, staged_advertiser_exists)
+        .distinct(ml_scores_staging.c.client_id, ml_scores_staging.c.advertiser_id)
+        .order_by(
+            ml_scores_staging.c.client_id,
+            ml_scores_staging.c.advertiser_id,
+            ml_scores_staging.c.row_number.desc(),
+        )
+    )
+
+
+async def report_missing_references(
+    report: ImportReport,
+    session: AsyncSession,
+) -> None:
+    missing_filter = ~staged_client_exists | ~staged_advertiser_exists
+    missing_count = await session.scalar(
+        select(func.count()).select_from(ml_scores_staging).where(missing_filter)
+    )
+    if not missing_count:
+        return
+    report.rows_loaded -= missing_count
+    report.rows_failed += missing_count
+    missing_result = await session.execute(
+        select(
+            ml_scores_staging.c.row_number,
+            staged_client_exists.label("client_exists"),
+            staged_advertiser_exists.label("advertiser_exists"),
+        )
+        .where(missing_filter)
+        .order_by(ml_scores_staging.c.row_number)
+        .limit(settings.ml_scores_upload_max_errors)
+    )
+    for missing_row in missing_result.all():
+        errors = []
+        if not missing_row.client_exists:
+            errors.append("Client not found")
+        if not missing_row.advertiser_exists:
+            errors.append("Advertiser not found")
+        report.errors.append(RowError(row=missing_row.row_number, errors=errors))
+    report.errors.sort(key=lambda error: error.row)
+    del report.errors[settings.ml_scores_upload_max_errors :]
+
+
+async def lock_ml_score_state(
+    session: AsyncSession, shared: bool = False
+) -> models.MLScoreState:
+    query = select(models.MLScoreState).with_for_update(read=shared, key_share=shared)
+    ml_score_state = await session.scalar(query)
+    if ml_score_state is None:
+        await session.execute(
+            insert(models.MLScoreState)
+            .values(
+                id=uuid4(),
+                active_version=0,
+                max_score=select(func.max(models.MLScore.score))
+                .where(models.MLScore.version == 0)
+                .scalar_subquery(),
+            )
+            .on_conflict_do_nothing(index_elements=[models.MLScoreState.singleton])
+        )
+        ml_score_state = await session.scalar(query)
+    return ml_score_state
+
+
+async def may_lower_max_ml_score(
+    previous_score: float | None, score: float | None, session: AsyncSession
+) -> bool:
+    if previous_score is None or (score is not None and score >= previous_score):
+        return False
+    max_score = await session.scalar(select(models.MLScoreState.max_score))
+    return max_score is not None and previous_score >= max_score
+
+
+async def update_max_ml_score(
+    ml_score_state: models.MLScoreState,
+    previous_score: float | None,
+    score: float,
+    session: AsyncSession,
+) -> None:
+    max_score = ml_score_state.max_score
+    if max_score is None or score > max_score:
+        await session.execute(
+            update(models.MLScoreState)
+            .where(
+                or_(
+                    models.MLScoreState.max_score.is_(None),
+                    models.MLScoreState.max_score < score,
+                )
+            )
+            .values(max_score=score)
+        )
+    elif previous_score is not None and previous_score >= max_score:
+        await session.refresh(ml_score_state, with_for_update=True)
+        ml_score_state.max_score = await session.scalar(
+            select(func.max(models.MLScore.score)).where(
+                models.MLScore.version == ml_score_state.active_version
+            )
+        )
+
+
+def get_active_ml_score_version():
+    return select(models.MLScoreState.active_version).scalar_subquery()
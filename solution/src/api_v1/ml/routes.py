@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import postgres_helper
+from src.core.utils import enums
+from src.core.utils.stream_import import ImportReport
 
 from src.api_v1.ml import crud as ml_crud, schemas as ml_schemas
 
@@ -17,3 +19,39 @@ async def add_or_update_ml_score(
         ml_score_in=ml_score_in,
         session=session,
     )
+
+
+@router.post(
+    "/upload",
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_ml_scores(
+    request: Request,
+    import_format: enums.ExportFormatEnum = Query(
+        enums.ExportFormatEnum.NDJSON, alias="format"
+    ),
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> ImportReport:
+    return await ml_crud.upload_ml_scores(
+        chunks=request.stream(),
+        import_format=import_format,
+        session=session,
+    )
+
+
+@router.post(
+    "/snapshots",
+    status_code=status.HTTP_201_CREATED,
+)
+async def publish_ml_score_snapshot(
+    request: Request,
+    import_format: enums.ExportFormatEnum = Query(
+        enums.ExportFormatEnum.NDJSON, alias="format"
+    ),
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> ml_schemas.MLScoreSnapshotReport:
+    return await ml_crud.publish_ml_score_snapshot(
+        chunks=request.stream(),
+        import_format=import_format,
+        session=session,
+    )
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, ConfigDict, PositiveInt, NonNegativeInt
 from uuid import UUID
 
+from src.core.utils.stream_import import ImportReport
+
 
 class MLScoreBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -14,3 +16,7 @@ class MLScoreCreate(MLScoreBase): ...
 
 
 class MLScore(MLScoreBase): ...
+
+
+class MLScoreSnapshotReport(ImportReport):
+    version: int
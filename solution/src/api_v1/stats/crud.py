@@ -1,11 +1,106 @@
+from types import SimpleNamespace
+from typing import AsyncIterator
 from uuid import UUID
-from sqlalchemy import select, func
+from fastapi import HTTPException
+from sqlalchemy import select, func, delete, and_, or_, literal, union_all
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import models
+from src.core.data import settings
+from src.core.database import postgres_helper, models
 from src.api_v1.stats import schemas as stats_schemas
 from src.api_v1.campaigns import crud as campaigns_crud
 from src.api_v1.advertisers import crud as advertisers_crud
+from src.api_v1.time import crud as time_crud
+from src.core.utils import enums
+from src.core.utils.daily_stats_cache import daily_stats_cache
+from src.core.utils.dashboard_metrics_cache import dashboard_metrics_cache
+from src.core.utils.hll import estimate_cardinality, merge_sketches
+from src.core.utils.prefix_sum_index import PrefixSums, prefix_sum_index
+from src.core.utils.stream_export import encode_batches
+
+
+STAT_COLUMNS = [
+    "impressions_count",
+    "clicks_count",
+    "spent_impressions",
+    "spent_clicks",
+]
+
+DAILY_STATS_CHANNEL = "daily_stats"
+
+campaign_daily_stats = models.CampaignDailyStat.__table__
+advertiser_daily_stats = models.AdvertiserDailyStat.__table__
+campaign_daily_reach = models.CampaignDailyReach.__table__
+
+
+def select_stats(
+    stats,
+    group_by: list | None = None,
+    filters: list | None = None,
+    source=None,
+):
+    group_by = group_by or []
+    return (
+        select(
+            *group_by,
+            *(func.sum(stats.c[column]).label(column) for column in STAT_COLUMNS),
+        )
+        .select_from(stats if source is None else source)
+        .where(*(filters or []))
+        .group_by(*group_by)
+        .order_by(*group_by)
+    )
+
+
+def get_event_stats():
+    impressions = (
+        select(
+            models.UniqueImpression.campaign_id,
+            models.UniqueImpression.date,
+            func.count().label("impressions_count"),
+            func.sum(models.UniqueImpression.cost).label("spent_impressions"),
+        )
+        .group_by(models.UniqueImpression.campaign_id, models.UniqueImpression.date)
+        .subquery("impressions")
+    )
+    clicks = (
+        select(
+            models.UniqueClick.campaign_id,
+            models.UniqueClick.date,
+            func.count().label("clicks_count"),
+            func.sum(models.UniqueClick.cost).label("spent_clicks"),
+        )
+        .group_by(models.UniqueClick.campaign_id, models.UniqueClick.date)
+        .subquery("clicks")
+    )
+    return (
+        select(
+            func.coalesce(impressions.c.campaign_id, clicks.c.campaign_id).label(
+                "campaign_id"
+            ),
+            func.coalesce(impressions.c.date, clicks.c.date).label("date"),
+            func.coalesce(impressions.c.impressions_count, 0).label(
+                "impressions_count"
+            ),
+            func.coalesce(clicks.c.clicks_count, 0).label("clicks_count"),
+            func.coalesce(impressions.c.spent_impressions, 0).label(
+                "spent_impressions"
+            ),
+            func.coalesce(clicks.c.spent_clicks, 0).label("spent_clicks"),
+        )
+        .select_from(
+            impressions.join(
+                clicks,
+                and_(
+                    clicks.c.campaign_id == impressions.c.campaign_id,
+                    clicks.c.date == impressions.c.date,
+                ),
+                full=True,
+            )
+        )
+        .subquery("event_stats")
+    )
 
 
 async def get_campaign_stats(
@@ -17,52 +112,259 @@ async def get_campaign_stats(
         advertiser_id=None,
         session=session,
     )
+    stats_result = await session.execute(
+        select_stats(
+            campaign_daily_stats,
+            filters=[campaign_daily_stats.c.campaign_id == campaign.campaign_id],
+        )
+    )
+    return build_stat(stats_result.first())
 
-    impressions_query = select(
-        func.count(models.UniqueImpression.client_id).label("impressions_count"),
-        func.sum(models.UniqueImpression.cost).label("spent_impressions"),
-    ).where(models.UniqueImpression.campaign_id == campaign.campaign_id)
 
-    impressions_result = await session.execute(impressions_query)
-    impressions_data = impressions_result.first()
+async def get_campaigns_stats(
+    stats_in: stats_schemas.CampaignStatsBulkRequest,
+    session: AsyncSession,
+) -> list[stats_schemas.CampaignStat]:
+    campaigns_filter = await get_campaigns_filter(
+        selector=stats_in,
+        session=session,
+    )
+    group_by = [models.Campaign.campaign_id]
+    if stats_in.include_daily:
+        group_by.append(campaign_daily_stats.c.date)
+    stats_result = await session.execute(
+        select_stats(
+            campaign_daily_stats,
+            group_by=group_by,
+            filters=[campaigns_filter, models.Campaign.is_deleted == False],
+            source=models.Campaign.__table__.outerjoin(
+                campaign_daily_stats,
+                campaign_daily_stats.c.campaign_id == models.Campaign.campaign_id,
+            ),
+        )
+    )
 
-    clicks_query = select(
-        func.count(models.UniqueClick.client_id).label("clicks_count"),
-        func.sum(models.UniqueClick.cost).label("spent_clicks"),
-    ).where(models.UniqueClick.campaign_id == campaign.campaign_id)
+    if not stats_in.include_daily:
+        return [
+            stats_schemas.CampaignStat(
+                campaign_id=campaign_data.campaign_id,
+                **build_stat(campaign_data).model_dump(),
+            )
+            for campaign_data in stats_result.all()
+        ]
+
+    campaigns_daily_data = {}
+    for day_data in stats_result.all():
+        daily_data = campaigns_daily_data.setdefault(day_data.campaign_id, [])
+        if day_data.date is not None:
+            daily_data.append(day_data)
+    return [
+        stats_schemas.CampaignStat(
+            campaign_id=campaign_id,
+            daily=build_daily_stats(daily_data),
+            **build_stat(sum_daily_data(daily_data)).model_dump(),
+        )
+        for campaign_id, daily_data in campaigns_daily_data.items()
+    ]
 
-    clicks_result = await session.execute(clicks_query)
-    clicks_data = clicks_result.first()
 
-    impressions_count = (
-        impressions_data.impressions_count
-        if impressions_data and impressions_data.impressions_count
-        else 0
+async def get_campaigns_range_stats(
+    stats_in: stats_schemas.CampaignRangeStatsRequest,
+    session: AsyncSession,
+) -> list[stats_schemas.CampaignStat]:
+    campaigns_filter = await get_campaigns_filter(
+        selector=stats_in,
+        session=session,
     )
-    clicks_count = (
-        clicks_data.clicks_count if clicks_data and clicks_data.clicks_count else 0
+    campaigns_result = await session.execute(
+        select(models.Campaign.campaign_id).where(
+            campaigns_filter,
+            models.Campaign.is_deleted == False,
+        )
     )
-    conversion = (
-        (clicks_count / impressions_count * 100) if impressions_count > 0 else 0
+    campaign_ids = campaigns_result.scalars().all()
+
+    try:
+        current_date = await time_crud.get_current_date(session=session)
+        current_day = current_date.current_date
+    except HTTPException:
+        current_day = None
+    prefix_sums = {}
+    if current_day is not None and stats_in.from_date < current_day:
+        prefix_sums = await get_prefix_sums(
+            campaign_ids=campaign_ids,
+            current_day=current_day,
+            session=session,
+        )
+
+    totals = {
+        campaign_id: dict.fromkeys(STAT_COLUMNS, 0) for campaign_id in campaign_ids
+    }
+    for campaign_id, campaign_prefix_sums in prefix_sums.items():
+        for column in STAT_COLUMNS:
+            totals[campaign_id][column] += campaign_prefix_sums.get_range(
+                column=column,
+                from_day=stats_in.from_date,
+                to_day=stats_in.to_date,
+            )
+
+    live_filters = []
+    unindexed_ids = [
+        campaign_id for campaign_id in campaign_ids if campaign_id not in prefix_sums
+    ]
+    if unindexed_ids:
+        live_filters.append(
+            and_(
+                campaign_daily_stats.c.campaign_id.in_(unindexed_ids),
+                campaign_daily_stats.c.date >= stats_in.from_date,
+            )
+        )
+    if prefix_sums:
+        live_filters.append(
+            and_(
+                campaign_daily_stats.c.campaign_id.in_(list(prefix_sums)),
+                campaign_daily_stats.c.date >= max(stats_in.from_date, current_day),
+            )
+        )
+    if live_filters:
+        live_result = await session.execute(
+            select_stats(
+                campaign_daily_stats,
+                group_by=[campaign_daily_stats.c.campaign_id],
+                filters=[
+                    or_(*live_filters),
+                    campaign_daily_stats.c.date <= stats_in.to_date,
+                ],
+            )
+        )
+        for campaign_data in live_result.all():
+            for column in STAT_COLUMNS:
+                totals[campaign_data.campaign_id][column] += getattr(
+                    campaign_data, column
+                )
+
+    return [
+        stats_schemas.CampaignStat(
+            campaign_id=campaign_id,
+            **build_stat(SimpleNamespace(**campaign_totals)).model_dump(),
+        )
+        for campaign_id, campaign_totals in totals.items()
+    ]
+
+
+async def get_campaigns_reach(
+    reach_in: stats_schemas.CampaignReachRequest,
+    session: AsyncSession,
+) -> stats_schemas.ReachStat:
+    campaigns_filter = await get_campaigns_filter(
+        selector=reach_in,
+        session=session,
     )
-    spent_impressions = (
-        impressions_data.spent_impressions
-        if impressions_data and impressions_data.spent_impressions
-        else 0
+    filters = [campaigns_filter, models.Campaign.is_deleted == False]
+    if reach_in.from_date is not None:
+        filters.append(campaign_daily_reach.c.date >= reach_in.from_date)
+    if reach_in.to_date is not None:
+        filters.append(campaign_daily_reach.c.date <= reach_in.to_date)
+    sketches_result = await session.execute(
+        select(
+            campaign_daily_reach.c.impressions_sketch,
+            campaign_daily_reach.c.clicks_sketch,
+        )
+        .join(
+            models.Campaign,
+            models.Campaign.campaign_id == campaign_daily_reach.c.campaign_id,
+        )
+        .where(*filters)
     )
-    spent_clicks = (
-        clicks_data.spent_clicks if clicks_data and clicks_data.spent_clicks else 0
+    sketches = sketches_result.all()
+    return stats_schemas.ReachStat(
+        impressions_reach=estimate_cardinality(
+            merge_sketches(day_sketches.impressions_sketch for day_sketches in sketches)
+        ),
+        clicks_reach=estimate_cardinality(
+            merge_sketches(day_sketches.clicks_sketch for day_sketches in sketches)
+        ),
     )
-    spent_total = spent_impressions + spent_clicks
 
-    return stats_schemas.Stat(
-        impressions_count=impressions_count,
-        clicks_count=clicks_count,
-        conversion=conversion,
-        spent_impressions=spent_impressions,
-        spent_clicks=spent_clicks,
-        spent_total=spent_total,
+
+async def get_prefix_sums(
+    campaign_ids: list[UUID],
+    current_day: int,
+    session: AsyncSession,
+) -> dict[UUID, PrefixSums]:
+    prefix_sums = {}
+    stale_prefix_sums = {}
+    for campaign_id in campaign_ids:
+        campaign_prefix_sums = prefix_sum_index.get(
+            key=campaign_id,
+            current_day=current_day,
+        )
+        if (
+            campaign_prefix_sums is not None
+            and campaign_prefix_sums.cached_until == current_day
+        ):
+            prefix_sums[campaign_id] = campaign_prefix_sums
+        else:
+            stale_prefix_sums[campaign_id] = campaign_prefix_sums
+    if not stale_prefix_sums:
+        return prefix_sums
+
+    cached_untils = [
+        None if campaign_prefix_sums is None else campaign_prefix_sums.cached_until
+        for campaign_prefix_sums in stale_prefix_sums.values()
+    ]
+    days_query = (
+        select(campaign_daily_stats)
+        .where(
+            campaign_daily_stats.c.campaign_id.in_(list(stale_prefix_sums)),
+            campaign_daily_stats.c.date < current_day,
+        )
+        .order_by(campaign_daily_stats.c.campaign_id, campaign_daily_stats.c.date)
+    )
+    if None not in cached_untils:
+        days_query = days_query.where(campaign_daily_stats.c.date >= min(cached_untils))
+    days_result = await session.execute(days_query)
+    campaigns_days = {}
+    for day_data in days_result.all():
+        campaigns_days.setdefault(day_data.campaign_id, []).append(day_data)
+
+    for campaign_id, campaign_prefix_sums in stale_prefix_sums.items():
+        cached_until = (
+            None if campaign_prefix_sums is None else campaign_prefix_sums.cached_until
+        )
+        prefix_sum_index.extend(
+            key=campaign_id,
+            days=[
+                day_data
+                for day_data in campaigns_days.get(campaign_id, [])
+                if cached_until is None or day_data.date >= cached_until
+            ],
+            cached_from=cached_until,
+            cached_until=current_day,
+        )
+        campaign_prefix_sums = prefix_sum_index.get(
+            key=campaign_id,
+            current_day=current_day,
+        )
+        if (
+            campaign_prefix_sums is not None
+            and campaign_prefix_sums.cached_until == current_day
+        ):
+            prefix_sums[campaign_id] = campaign_prefix_sums
+    return prefix_sums
+
+
+async def get_campaigns_filter(
+    selector: stats_schemas.CampaignsSelector,
+    session: AsyncSession,
+):
+    if selector.advertiser_id is None:
+        return models.Campaign.campaign_id.in_(selector.campaign_ids)
+    advertiser = await advertisers_crud.get_advertiser(
+        advertiser_id=selector.advertiser_id,
+        session=session,
     )
+    return models.Campaign.advertiser_id == advertiser.advertiser_id
 
 
 async def get_advertiser_stats(
@@ -73,57 +375,106 @@ async def get_advertiser_stats(
         advertiser_id=advertiser_id,
         session=session,
     )
-    impressions_query = (
-        select(
-            func.count(models.UniqueImpression.client_id).label("impressions_count"),
-            func.sum(func.coalesce(models.UniqueImpression.cost, 0)).label(
-                "spent_impressions"
-            ),
-        )
-        .join(
-            models.Campaign,
-            models.UniqueImpression.campaign_id == models.Campaign.campaign_id,
+    stats_result = await session.execute(
+        select_stats(
+            advertiser_daily_stats,
+            filters=[
+                advertiser_daily_stats.c.advertiser_id == advertiser.advertiser_id
+            ],
         )
-        .where(models.Campaign.advertiser_id == advertiser.advertiser_id)
     )
-    impressions_result = await session.execute(impressions_query)
-    impressions_data = impressions_result.first()
+    return build_stat(stats_result.first())
 
-    clicks_query = (
-        select(
-            func.count(models.UniqueClick.client_id).label("clicks_count"),
-            func.sum(models.UniqueClick.cost).label("spent_clicks"),
-        )
-        .join(
-            models.Campaign,
-            models.UniqueClick.campaign_id == models.Campaign.campaign_id,
-        )
-        .where(models.Campaign.advertiser_id == advertiser.advertiser_id)
+
+async def get_daily_stats(
+    stats,
+    key_column,
+    key: UUID,
+    daily_filter: stats_schemas.DailyStatsFilter,
+    session: AsyncSession,
+):
+    daily_query = select_stats(
+        stats,
+        group_by=[stats.c.date],
+        filters=[key_column == key],
+    )
+    if daily_filter.to_date is not None:
+        daily_query = daily_query.where(stats.c.date <= daily_filter.to_date)
+    try:
+        current_date = await time_crud.get_current_date(session=session)
+    except HTTPException:
+        if daily_filter.first_date is not None:
+            daily_query = daily_query.where(stats.c.date >= daily_filter.first_date)
+        daily_result = await session.execute(daily_query.limit(daily_filter.limit))
+        return daily_result.all()
+
+    current_day = current_date.current_date
+    cache_key = (stats.name, key)
+    cached_days, cached_until = daily_stats_cache.get(
+        key=cache_key,
+        current_day=current_day,
     )
+    cached_days = [
+        day_data for day_data in cached_days if daily_filter.matches(day_data.date)
+    ]
+    query_limit = daily_filter.limit
+    if query_limit is not None:
+        if len(cached_days) >= query_limit:
+            return cached_days[:query_limit]
+        query_limit -= len(cached_days)
+
+    query_from_date = cached_until
+    if daily_filter.first_date is not None and (
+        query_from_date is None or daily_filter.first_date > query_from_date
+    ):
+        query_from_date = daily_filter.first_date
+    if query_from_date is not None:
+        daily_query = daily_query.where(stats.c.date >= query_from_date)
+    daily_result = await session.execute(daily_query.limit(query_limit))
+    daily_data = daily_result.all()
+
+    if (
+        query_from_date == cached_until
+        and (daily_filter.to_date is None or daily_filter.to_date >= current_day - 1)
+        and (query_limit is None or len(daily_data) < query_limit)
+    ):
+        finished_days = [
+            day_data for day_data in daily_data if day_data.date < current_day
+        ]
+        daily_stats_cache.extend(
+            key=cache_key,
+            days=finished_days,
+            cached_from=cached_until,
+            cached_until=current_day,
+        )
+    return cached_days + daily_data
 
-    clicks_result = await session.execute(clicks_query)
-    clicks_data = clicks_result.first()
 
+def build_stat(counters_data) -> stats_schemas.Stat:
     impressions_count = (
-        impressions_data.impressions_count
-        if impressions_data and impressions_data.impressions_count
+        counters_data.impressions_count
+        if counters_data and counters_data.impressions_count
         else 0
     )
     clicks_count = (
-        clicks_data.clicks_count if clicks_data and clicks_data.clicks_count else 0
+        counters_data.clicks_count
+        if counters_data and counters_data.clicks_count
+        else 0
     )
     conversion = (
         (clicks_count / impressions_count * 100) if impressions_count > 0 else 0
     )
     spent_impressions = (
-        impressions_data.spent_impressions
-        if impressions_data and impressions_data.spent_impressions
+        counters_data.spent_impressions
+        if counters_data and counters_data.spent_impressions
         else 0
     )
     spent_clicks = (
-        clicks_data.spent_clicks if clicks_data and clicks_data.spent_clicks else 0
+        counters_data.spent_clicks
+        if counters_data and counters_data.spent_clicks
+        else 0
     )
-    spent_total = (spent_impressions or 0) + (spent_clicks or 0)
+    spent_total = spent_impressions + spent_clicks
 
     return stats_schemas.Stat(
         impressions_count=impressions_count,
@@ -135,8 +486,28 @@ async def get_advertiser_stats(
     )
 
 
+def sum_daily_data(daily_data) -> SimpleNamespace:
+    return SimpleNamespace(
+        **{
+            column: sum(getattr(day_data, column) for day_data in daily_data)
+            for column in STAT_COLUMNS
+        }
+    )
+
+
+def build_daily_stats(daily_data) -> list[stats_schemas.DailyStat]:
+    return [
+        stats_schemas.DailyStat(
+            date=day_data.date,
+            **build_stat(day_data).model_dump(),
+        )
+        for day_data in daily_data
+    ]
+
+
 async def get_campaign_daily_stat(
     campaign_id: UUID,
+    daily_filter: stats_schemas.DailyStatsFilter,
     session: AsyncSession,
 ) -> list[stats_schemas.DailyStat]:
     campaign = await campaigns_crud.get_campaign_by_id(
@@ -144,157 +515,292 @@ async def get_campaign_daily_stat(
         advertiser_id=None,
         session=session,
     )
-    impressions_query = (
-        select(
-            models.UniqueImpression.date,
-            func.count(models.UniqueImpression.client_id).label("impressions_count"),
-            func.sum(models.UniqueImpression.cost).label("spent_impressions"),
-        )
-        .where(models.UniqueImpression.campaign_id == campaign.campaign_id)
-        .group_by(models.UniqueImpression.date)
+    daily_data = await get_daily_stats(
+        stats=campaign_daily_stats,
+        key_column=campaign_daily_stats.c.campaign_id,
+        key=campaign.campaign_id,
+        daily_filter=daily_filter,
+        session=session,
     )
+    return build_daily_stats(daily_data)
 
-    impressions_result = await session.execute(impressions_query)
-    impressions_data = impressions_result.all()
 
-    clicks_query = (
-        select(
-            models.UniqueClick.date,
-            func.count(models.UniqueClick.client_id).label("clicks_count"),
-            func.sum(models.UniqueClick.cost).label("spent_clicks"),
-        )
-        .where(models.UniqueClick.campaign_id == campaign.campaign_id)
-        .group_by(models.UniqueClick.date)
+async def get_advertiser_campaigns_daily_stat(
+    advertiser_id: UUID,
+    daily_filter: stats_schemas.DailyStatsFilter,
+    session: AsyncSession,
+) -> list[stats_schemas.DailyStat]:
+    advertiser = await advertisers_crud.get_advertiser(
+        advertiser_id=advertiser_id,
+        session=session,
+    )
+    daily_data = await get_daily_stats(
+        stats=advertiser_daily_stats,
+        key_column=advertiser_daily_stats.c.advertiser_id,
+        key=advertiser.advertiser_id,
+        daily_filter=daily_filter,
+        session=session,
     )
+    return build_daily_stats(daily_data)
 
-    clicks_result = await session.execute(clicks_query)
-    clicks_data = clicks_result.all()
 
-    daily_stats = {}
-    for date, impressions_count, spent_impressions in impressions_data:
-        daily_stats[date] = {
-            "impressions_count": impressions_count,
-            "spent_impressions": spent_impressions,
-            "clicks_count": 0,
-            "spent_clicks": 0,
-        }
+async def get_dashboard_metrics(
+    from_date: int | None,
+    to_date: int | None,
+    session: AsyncSession,
+) -> stats_schemas.DashboardMetrics:
+    daily_filter = stats_schemas.DailyStatsFilter(from_date=from_date, to_date=to_date)
+    cache_key = (daily_filter.from_date, daily_filter.to_date)
+    dashboard_metrics = dashboard_metrics_cache.get(cache_key)
+    if dashboard_metrics is None:
+        dashboard_metrics = await build_dashboard_metrics(
+            daily_filter=daily_filter,
+            session=session,
+        )
+        dashboard_metrics_cache.set(cache_key, dashboard_metrics)
+    return dashboard_metrics
 
-    for date, clicks_count, spent_clicks in clicks_data:
-        if date in daily_stats:
-            daily_stats[date]["clicks_count"] = clicks_count
-            daily_stats[date]["spent_clicks"] = spent_clicks
-        else:
-            daily_stats[date] = {
-                "impressions_count": 0,
-                "spent_impressions": 0,
-                "clicks_count": clicks_count,
-                "spent_clicks": spent_clicks,
-            }
-
-    result = []
-    for date, stats in daily_stats.items():
-        impressions_count = stats["impressions_count"]
-        clicks_count = stats["clicks_count"]
-        conversion = (
-            (clicks_count / impressions_count * 100) if impressions_count > 0 else 0
-        )
-        result.append(
+
+async def build_dashboard_metrics(
+    daily_filter: stats_schemas.DailyStatsFilter,
+    session: AsyncSession,
+) -> stats_schemas.DashboardMetrics:
+    daily_query = select(campaign_daily_stats).order_by(
+        campaign_daily_stats.c.date, campaign_daily_stats.c.campaign_id
+    )
+    if daily_filter.from_date is not None:
+        daily_query = daily_query.where(
+            campaign_daily_stats.c.date >= daily_filter.from_date
+        )
+    if daily_filter.to_date is not None:
+        daily_query = daily_query.where(
+            campaign_daily_stats.c.date <= daily_filter.to_date
+        )
+    daily_result = await session.execute(daily_query)
+    days_data = {}
+    campaigns_daily = []
+    for day_data in daily_result.all():
+        days_data.setdefault(day_data.date, []).append(day_data)
+        campaigns_daily.append(
+            stats_schemas.CampaignDailyStat(
+                campaign_id=day_data.campaign_id,
+                date=day_data.date,
+                **build_stat(day_data).model_dump(),
+            )
+        )
+    return stats_schemas.DashboardMetrics(
+        daily=[
             stats_schemas.DailyStat(
                 date=date,
-                impressions_count=impressions_count,
-                clicks_count=clicks_count,
-                conversion=conversion,
-                spent_impressions=stats["spent_impressions"],
-                spent_clicks=stats["spent_clicks"],
-                spent_total=(stats["spent_impressions"] or 0)
-                + (stats["spent_clicks"] or 0),
+                **build_stat(sum_daily_data(daily_data)).model_dump(),
             )
-        )
+            for date, daily_data in days_data.items()
+        ],
+        campaigns_daily=campaigns_daily,
+    )
+
 
-    return result
+async def export_daily_stats(
+    campaign_id: UUID | None,
+    advertiser_id: UUID | None,
+    from_date: int | None,
+    to_date: int | None,
+    export_format: enums.ExportFormatEnum,
+    session: AsyncSession,
+) -> AsyncIterator[str]:
+    await check_export_scope(
+        campaign_id=campaign_id,
+        advertiser_id=advertiser_id,
+        session=session,
+    )
+    filters = get_export_filters(
+        campaign_id_column=campaign_daily_stats.c.campaign_id,
+        date_column=campaign_daily_stats.c.date,
+        campaign_id=campaign_id,
+        advertiser_id=advertiser_id,
+        from_date=from_date,
+        to_date=to_date,
+    )
+    daily_query = (
+        select(campaign_daily_stats)
+        .where(*filters)
+        .order_by(campaign_daily_stats.c.campaign_id, campaign_daily_stats.c.date)
+    )
+    return encode_batches(
+        batches=stream_batches(
+            query=daily_query,
+            build_item=lambda day_data: stats_schemas.CampaignDailyStat(
+                campaign_id=day_data.campaign_id,
+                date=day_data.date,
+                **build_stat(day_data).model_dump(),
+            ),
+        ),
+        schema=stats_schemas.CampaignDailyStat,
+        export_format=export_format,
+    )
 
 
-async def get_advertiser_campaigns_daily_stat(
-    advertiser_id: UUID,
+async def export_events(
+    campaign_id: UUID | None,
+    advertiser_id: UUID | None,
+    from_date: int | None,
+    to_date: int | None,
+    export_format: enums.ExportFormatEnum,
     session: AsyncSession,
-) -> list[stats_schemas.DailyStat]:
-    advertiser = await advertisers_crud.get_advertiser(
+) -> AsyncIterator[str]:
+    await check_export_scope(
+        campaign_id=campaign_id,
         advertiser_id=advertiser_id,
         session=session,
     )
-    impressions_query = (
-        select(
-            models.UniqueImpression.date,
-            func.count(models.UniqueImpression.client_id).label("impressions_count"),
-            func.sum(models.UniqueImpression.cost).label("spent_impressions"),
+    events_queries = []
+    for event_model, event_type in (
+        (models.UniqueImpression, enums.EventTypeEnum.IMPRESSION),
+        (models.UniqueClick, enums.EventTypeEnum.CLICK),
+    ):
+        filters = get_export_filters(
+            campaign_id_column=event_model.campaign_id,
+            date_column=event_model.date,
+            campaign_id=campaign_id,
+            advertiser_id=advertiser_id,
+            from_date=from_date,
+            to_date=to_date,
         )
-        .join(
-            models.Campaign,
-            models.UniqueImpression.campaign_id == models.Campaign.campaign_id,
+        events_queries.append(
+            select(
+                literal(event_type.value).label("event_type"),
+                event_model.client_id,
+                event_model.campaign_id,
+                event_model.date,
+                event_model.cost,
+            ).where(*filters)
         )
-        .where(models.Campaign.advertiser_id == advertiser.advertiser_id)
-        .group_by(models.UniqueImpression.date)
+    return encode_batches(
+        batches=stream_batches(
+            query=union_all(*events_queries),
+            build_item=lambda event: stats_schemas.Event(**event._mapping),
+        ),
+        schema=stats_schemas.Event,
+        export_format=export_format,
     )
 
-    impressions_result = await session.execute(impressions_query)
-    impressions_data = impressions_result.all()
 
-    clicks_query = (
-        select(
-            models.UniqueClick.date,
-            func.count(models.UniqueClick.client_id).label("clicks_count"),
-            func.sum(models.UniqueClick.cost).label("spent_clicks"),
+async def check_export_scope(
+    campaign_id: UUID | None,
+    advertiser_id: UUID | None,
+    session: AsyncSession,
+) -> None:
+    if campaign_id is not None:
+        await campaigns_crud.get_campaign_by_id(
+            campaign_id=campaign_id,
+            advertiser_id=advertiser_id,
+            session=session,
         )
-        .join(
-            models.Campaign,
-            models.UniqueClick.campaign_id == models.Campaign.campaign_id,
+    elif advertiser_id is not None:
+        await advertisers_crud.get_advertiser(
+            advertiser_id=advertiser_id,
+            session=session,
         )
-        .where(models.Campaign.advertiser_id == advertiser.advertiser_id)
-        .group_by(models.UniqueClick.date)
-    )
 
-    clicks_result = await session.execute(clicks_query)
-    clicks_data = clicks_result.all()
 
-    daily_stats = {}
-    for date, impressions_count, spent_impressions in impressions_data:
-        daily_stats[date] = {
-            "impressions_count": impressions_count,
-            "spent_impressions": spent_impressions,
-            "clicks_count": 0,
-            "spent_clicks": 0,
-        }
+def get_export_filters(
+    campaign_id_column,
+    date_column,
+    campaign_id: UUID | None,
+    advertiser_id: UUID | None,
+    from_date: int | None,
+    to_date: int | None,
+) -> list:
+    filters = []
+    if campaign_id is not None:
+        filters.append(campaign_id_column == campaign_id)
+    elif advertiser_id is not None:
+        filters.append(
+            campaign_id_column.in_(
+                select(models.Campaign.campaign_id).where(
+                    models.Campaign.advertiser_id == advertiser_id
+                )
+            )
+        )
+    if from_date is not None:
+        filters.append(date_column >= from_date)
+    if to_date is not None:
+        filters.append(date_column <= to_date)
+    return filters
 
-    for date, clicks_count, spent_clicks in clicks_data:
-        if date in daily_stats:
-            daily_stats[date]["clicks_count"] = clicks_count
-            daily_stats[date]["spent_clicks"] = spent_clicks
-        else:
-            daily_stats[date] = {
-                "impressions_count": 0,
-                "spent_impressions": 0,
-                "clicks_count": clicks_count,
-                "spent_clicks": spent_clicks,
-            }
-
-    result = []
-    for date, stats in daily_stats.items():
-        impressions_count = stats["impressions_count"]
-        clicks_count = stats["clicks_count"]
-        conversion = (
-            (clicks_count / impressions_count * 100) if impressions_count > 0 else 0
-        )
-        result.append(
-            stats_schemas.DailyStat(
-                date=date,
-                impressions_count=impressions_count,
-                clicks_count=clicks_count,
-                conversion=conversion,
-                spent_impressions=stats["spent_impressions"],
-                spent_clicks=stats["spent_clicks"],
-                spent_total=(stats["spent_impressions"] or 0)
-                + (stats["spent_clicks"] or 0),
+
+async def stream_batches(query, build_item) -> AsyncIterator[list]:
+    async with postgres_helper.session_factory() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=settings.export_batch_size)
+        )
+        async for partition in result.partitions():
+            yield [build_item(row) for row in partition]
+
+
+async def rebuild_campaign_counters(session: AsyncSession) -> None:
+    event_stats = get_event_stats()
+    await session.execute(delete(models.CampaignCounter))
+    await session.execute(
+        insert(models.CampaignCounter).from_select(
+            ["campaign_id", *STAT_COLUMNS],
+            select_stats(event_stats, group_by=[event_stats.c.campaign_id]),
+        )
+    )
+    await session.commit()
+
+
+async def rebuild_daily_stats(session: AsyncSession) -> None:
+    event_stats = get_event_stats()
+    await session.execute(delete(models.AdvertiserDailyStat))
+    await session.execute(delete(models.CampaignDailyStat))
+    await session.execute(delete(models.CampaignDailyReach))
+    await session.execute(
+        insert(models.CampaignDailyStat).from_select(
+            ["campaign_id", "date", *STAT_COLUMNS],
+            select_stats(
+                event_stats,
+                group_by=[event_stats.c.campaign_id, event_stats.c.date],
+            ),
+        )
+    )
+    await session.execute(
+        insert(models.AdvertiserDailyStat).from_select(
+            ["advertiser_id", "date", *STAT_COLUMNS],
+            select_stats(
+                campaign_daily_stats,
+                group_by=[models.Campaign.advertiser_id, campaign_daily_stats.c.date],
+                source=campaign_daily_stats.join(
+                    models.Campaign.__table__,
+                    models.Campaign.campaign_id == campaign_daily_stats.c.campaign_id,
+                ),
+            ),
+        )
+    )
+    for event_model, sketch_key in (
+        (models.UniqueImpression, "impressions_sketch"),
+        (models.UniqueClick, "clicks_sketch"),
+    ):
+        stmt = insert(models.CampaignDailyReach).from_select(
+            ["campaign_id", "date", sketch_key],
+            select(
+                event_model.campaign_id,
+                event_model.date,
+                func.hll_agg(event_model.client_id),
+            ).group_by(event_model.campaign_id, event_model.date),
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["campaign_id", "date"],
+                set_={sketch_key: stmt.excluded[sketch_key]},
             )
         )
+    await session.execute(select(func.pg_notify(DAILY_STATS_CHANNEL, "")))
+    await session.commit()
+    handle_daily_stats_notification(None)
+
 
-    return result
+def handle_daily_stats_notification(payload: str | None) -> None:
+    daily_stats_cache.clear()
+    prefix_sum_index.clear()
+    dashboard_metrics_cache.clear()
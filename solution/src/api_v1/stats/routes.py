@@ -1,15 +1,52 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status, Body
+from fastapi import APIRouter, Depends, Query, status, Body
+from fastapi.responses import StreamingResponse
+from pydantic import NonNegativeInt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import postgres_helper
 from src.api_v1.stats import schemas as stats_schemas, crud as stats_crud
+from src.core.utils import enums
+from src.core.utils.stream_export import MEDIA_TYPES
 
 router = APIRouter(prefix="/stats", tags=["Statistics"])
 
 
+@router.post("/campaigns/bulk")
+async def get_campaigns_stats(
+    stats_in: stats_schemas.CampaignStatsBulkRequest,
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> list[stats_schemas.CampaignStat]:
+    return await stats_crud.get_campaigns_stats(
+        stats_in=stats_in,
+        session=session,
+    )
+
+
+@router.post("/campaigns/range")
+async def get_campaigns_range_stats(
+    stats_in: stats_schemas.CampaignRangeStatsRequest,
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> list[stats_schemas.CampaignStat]:
+    return await stats_crud.get_campaigns_range_stats(
+        stats_in=stats_in,
+        session=session,
+    )
+
+
+@router.post("/campaigns/reach")
+async def get_campaigns_reach(
+    reach_in: stats_schemas.CampaignReachRequest,
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> stats_schemas.ReachStat:
+    return await stats_crud.get_campaigns_reach(
+        reach_in=reach_in,
+        session=session,
+    )
+
+
 @router.get("/campaigns/{campaign_id}")
 async def get_campaign_stats(
     campaign_id: UUID,
@@ -35,10 +72,12 @@ async def get_advertiser_stat(
 @router.get("/campaigns/{campaign_id}/daily")
 async def get_campaign_daily_stat(
     campaign_id: UUID,
+    daily_filter: Annotated[stats_schemas.DailyStatsFilter, Query()],
     session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
 ) -> list[stats_schemas.DailyStat]:
     return await stats_crud.get_campaign_daily_stat(
         campaign_id=campaign_id,
+        daily_filter=daily_filter,
         session=session,
     )
 
@@ -46,9 +85,72 @@ async def get_campaign_daily_stat(
 @router.get("/advertisers/{advertiser_id}/campaigns/daily")
 async def get_advertiser_campaigns_daily_stat(
     advertiser_id: UUID,
+    daily_filter: Annotated[stats_schemas.DailyStatsFilter, Query()],
     session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
 ) -> list[stats_schemas.DailyStat]:
     return await stats_crud.get_advertiser_campaigns_daily_stat(
         advertiser_id=advertiser_id,
+        daily_filter=daily_filter,
         session=session,
     )
+
+
+@router.get("/dashboard")
+async def get_dashboard_metrics(
+    from_date: NonNegativeInt | None = None,
+    to_date: NonNegativeInt | None = None,
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> stats_schemas.DashboardMetrics:
+    return await stats_crud.get_dashboard_metrics(
+        from_date=from_date,
+        to_date=to_date,
+        session=session,
+    )
+
+
+@router.get("/export/daily")
+async def export_daily_stats(
+    campaign_id: UUID | None = None,
+    advertiser_id: UUID | None = None,
+    from_date: NonNegativeInt | None = None,
+    to_date: NonNegativeInt | None = None,
+    export_format: enums.ExportFormatEnum = Query(
+        enums.ExportFormatEnum.NDJSON, alias="format"
+    ),
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> StreamingResponse:
+    return StreamingResponse(
+        await stats_crud.export_daily_stats(
+            campaign_id=campaign_id,
+            advertiser_id=advertiser_id,
+            from_date=from_date,
+            to_date=to_date,
+            export_format=export_format,
+            session=session,
+        ),
+        media_type=MEDIA_TYPES[export_format],
+    )
+
+
+@router.get("/export/events")
+async def export_events(
+    campaign_id: UUID | None = None,
+    advertiser_id: UUID | None = None,
+    from_date: NonNegativeInt | None = None,
+    to_date: NonNegativeInt | None = None,
+    export_format: enums.ExportFormatEnum = Query(
+        enums.ExportFormatEnum.NDJSON, alias="format"
+    ),
+    session: AsyncSession = Depends(postgres_helper.scoped_session_dependency),
+) -> StreamingResponse:
+    return StreamingResponse(
+        await stats_crud.export_events(
+            campaign_id=campaign_id,
+            advertiser_id=advertiser_id,
+            from_date=from_date,
+            to_date=to_date,
+            export_format=export_format,
+            session=session,
+        ),
+        media_type=MEDIA_TYPES[export_format],
+    )
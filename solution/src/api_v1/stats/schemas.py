@@ -1,4 +1,15 @@
-from pydantic import BaseModel, NonNegativeInt, NonNegativeFloat
+from typing import Self
+from uuid import UUID
+
+from pydantic import (
+    BaseModel,
+    Field,
+    NonNegativeInt,
+    NonNegativeFloat,
+    model_validator,
+)
+
+from src.core.utils import enums
 
 
 class StatBase(BaseModel):
@@ -15,3 +26,101 @@ class Stat(StatBase): ...
 
 class DailyStat(StatBase):
     date: NonNegativeInt
+
+
+class DailyStatsFilter(BaseModel):
+    from_date: NonNegativeInt | None = None
+    to_date: NonNegativeInt | None = None
+    cursor: NonNegativeInt | None = None
+    limit: int | None = Field(None, ge=1, le=1000)
+
+    @model_validator(mode="after")
+    def validate_dates(self) -> Self:
+        if (
+            self.from_date is not None
+            and self.to_date is not None
+            and self.from_date > self.to_date
+        ):
+            raise ValueError("from_date должно быть меньше или равно to_date")
+        return self
+
+    @property
+    def first_date(self) -> int | None:
+        if self.cursor is None:
+            return self.from_date
+        return max(self.cursor + 1, self.from_date or 0)
+
+    def matches(self, date: int) -> bool:
+        if self.first_date is not None and date < self.first_date:
+            return False
+        if self.to_date is not None and date > self.to_date:
+            return False
+        return True
+
+
+class CampaignsSelector(BaseModel):
+    campaign_ids: list[UUID] | None = Field(None, min_length=1, max_length=10_000)
+    advertiser_id: UUID | None = None
+
+    @model_validator(mode="after")
+    def validate_selector(self) -> Self:
+        if (self.campaign_ids is None) == (self.advertiser_id is None):
+            raise ValueError("Нужно указать либо campaign_ids, либо advertiser_id")
+        return self
+
+
+class CampaignStatsBulkRequest(CampaignsSelector):
+    include_daily: bool = False
+
+
+class CampaignRangeStatsRequest(CampaignsSelector):
+    from_date: NonNegativeInt
+    to_date: NonNegativeInt
+
+    @model_validator(mode="after")
+    def validate_dates(self) -> Self:
+        if self.from_date > self.to_date:
+            raise ValueError("from_date должно быть меньше или равно to_date")
+        return self
+
+
+class CampaignReachRequest(CampaignsSelector):
+    from_date: NonNegativeInt | None = None
+    to_date: NonNegativeInt | None = None
+
+    @model_validator(mode="after")
+    def validate_dates(self) -> Self:
+        if (
+            self.from_date is not None
+            and self.to_date is not None
+            and self.from_date > self.to_date
+        ):
+            raise ValueError("from_date должно быть меньше или равно to_date")
+        return self
+
+
+class ReachStat(BaseModel):
+    impressions_reach: NonNegativeInt
+    clicks_reach: NonNegativeInt
+
+
+class CampaignStat(StatBase):
+    campaign_id: UUID
+    daily: list[DailyStat] | None = None
+
+
+class CampaignDailyStat(DailyStat):
+    campaign_id: UUID
+
+
+class DashboardMetrics(BaseModel):
+    daily: list[DailyStat]
+    campaigns_daily: list[CampaignDailyStat]
+
+
+class Event(BaseModel):
+    event_type: enums.EventTypeEnum
+    client_id: UUID
+    campaign_id: UUID
+    date: NonNegativeInt
+    cost: NonNegativeFloat
@@ -1,9 +1,26 @@
 from fastapi import status, HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.data import settings
 from src.core.database import models
 from src.api_v1.time import schemas as time_schemas
+from src.core.utils.campaign_index import campaign_index
+from src.core.utils.daily_stats_cache import daily_stats_cache
+from src.core.utils.dashboard_metrics_cache import dashboard_metrics_cache
+from src.core.utils.prefix_sum_index import prefix_sum_index
+from src.core.utils.ttl_cache import TTLCache
+
+CURRENT_DATE_CHANNEL = "current_date"
+CURRENT_DATE_KEY = "current_date"
+
+current_date_cache = TTLCache(maxsize=1, ttl=settings.current_date_cache_ttl)
+current_date_generation = 0
+
+
+def bump_current_date_generation() -> None:
+    global current_date_generation
+    current_date_generation += 1
 
 
 async def advance_time(
@@ -21,13 +38,29 @@ async def advance_time(
         current_date_instance.current_date = date_in.current_date
         current_date_value = date_in.current_date
 
+    await session.execute(
+        select(func.pg_notify(CURRENT_DATE_CHANNEL, str(current_date_value)))
+    )
     await session.commit()
+    bump_current_date_generation()
+    current_date_cache.set(
+        CURRENT_DATE_KEY,
+        time_schemas.Date(current_date=current_date_value),
+    )
+    campaign_index.invalidate()
+    daily_stats_cache.set_current_day(current_date_value)
+    prefix_sum_index.set_current_day(current_date_value)
+    dashboard_metrics_cache.clear()
     return time_schemas.Date(current_date=current_date_value)
 
 
 async def get_current_date(
     session: AsyncSession,
 ) -> time_schemas.Date:
+    cached_current_date = current_date_cache.get(CURRENT_DATE_KEY)
+    if cached_current_date is not None:
+        return cached_current_date
+    generation = current_date_generation
     current_date = await session.execute(select(models.CurrentDate))
     current_date = current_date.scalar_one_or_none()
     if current_date is None:
@@ -35,4 +68,24 @@ async def get_current_date(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Current date not found",
         )
-    return time_schemas.Date(current_date=current_date.current_date)
+    current_date = time_schemas.Date(current_date=current_date.current_date)
+    if generation == current_date_generation:
+        current_date_cache.set(CURRENT_DATE_KEY, current_date)
+    return current_date
+
+
+def handle_current_date_notification(payload: str | None) -> None:
+    bump_current_date_generation()
+    if payload is None:
+        current_date_cache.invalidate(CURRENT_DATE_KEY)
+        daily_stats_cache.set_current_day(None)
+        prefix_sum_index.set_current_day(None)
+        dashboard_metrics_cache.clear()
+        return
+    current_date_cache.set(
+        CURRENT_DATE_KEY,
+        time_schemas.Date(current_date=int(payload)),
+    )
+    daily_stats_cache.set_current_day(int(payload))
+    prefix_sum_index.set_current_day(int(payload))
+    dashboard_metrics_cache.clear()
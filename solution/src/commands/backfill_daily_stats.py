@@ -0,0 +1,14 @@
+import asyncio
+
+from src.core.database import postgres_helper
+from src.api_v1.stats import crud as stats_crud
+
+
+async def backfill_daily_stats() -> None:
+    async with postgres_helper.session_factory() as session:
+        await stats_crud.rebuild_daily_stats(session=session)
+    await postgres_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_daily_stats())
@@ -0,0 +1,12 @@
+import asyncio
+
+from src.core.database import event_partition_maintainer, postgres_helper
+
+
+async def maintain_event_partitions() -> None:
+    await event_partition_maintainer.maintain()
+    await postgres_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(maintain_event_partitions())
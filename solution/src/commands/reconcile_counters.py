@@ -0,0 +1,14 @@
+import asyncio
+
+from src.core.database import postgres_helper
+from src.api_v1.stats import crud as stats_crud
+
+
+async def reconcile_counters() -> None:
+    async with postgres_helper.session_factory() as session:
+        await stats_crud.rebuild_campaign_counters(session=session)
+    await postgres_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(reconcile_counters())
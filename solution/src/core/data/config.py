@@ -21,6 +21,42 @@ class Settings(BaseSettings):
 
     moderate_ad_text: bool
 
+    campaign_index_age_bucket_size: int = 10
+    campaign_index_max_age: int = 120
+    campaign_index_ttl: float = 1.0
+
+    client_cache_size: int = 100_000
+    client_cache_ttl: float = 30.0
+    clients_upsert_chunk_size: int = 10_000
+    import_max_line_length: int = 1_048_576
+    clients_upload_batch_size: int = 10_000
+    clients_upload_max_errors: int = 1_000
+    ml_scores_upload_batch_size: int = 10_000
+    ml_scores_upload_max_errors: int = 1_000
+    ml_scores_snapshot_lock_timeout_ms: int = 1_000
+    ml_scores_snapshot_attach_attempts: int = 5
+
+    current_date_cache_ttl: float = 60.0
+    event_partition_size: int = 30
+    event_partition_lookahead: int = 1
+    event_partition_maintenance_interval: float = 60.0
+    event_partition_lock_timeout_ms: int = 1_000
+
+    daily_stats_cache_max_days: int = 1_000_000
+    prefix_sum_index_max_days: int = 1_000_000
+    dashboard_metrics_ttl: float = 60.0
+    dashboard_metrics_cache_size: int = 32
+
+    export_batch_size: int = 1_000
+
+    impression_write_behind: bool = False
+    impression_flush_batch_size: int = 500
+    impression_flush_interval: float = 0.5
+    impression_buffer_max_size: int = 10_000
+    impression_buffer_block_when_full: bool = False
+    impression_flush_retry_interval: float = 0.5
+    impression_flush_max_retry_interval: float = 30.0
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
@@ -1,3 +1,9 @@
-__all__ = ("postgres_helper",)
+__all__ = (
+    "postgres_helper",
+    "notification_listener",
+    "event_partition_maintainer",
+)
 
 from src.core.database.helpers.postgres_helper import postgres_helper
+from src.core.database.helpers.notification_listener import notification_listener
+from src.core.database.helpers.event_partitions import event_partition_maintainer
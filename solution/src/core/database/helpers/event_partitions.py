@@ -0,0 +1,147 @@
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.core.data import settings
+from src.core.database.helpers.postgres_helper import postgres_helper
+
+logger = logging.getLogger(__name__)
+
+EVENT_PARTITIONS_LOCK_ID = 7_242_018
+
+
+class EventPartitionMaintainer:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        tables: tuple[str, ...],
+        partition_size: int,
+        lookahead: int,
+        interval: float,
+        lock_timeout_ms: int,
+    ):
+        self.engine = engine
+        self.tables = tables
+        self.partition_size = partition_size
+        self.lookahead = lookahead
+        self.interval = interval
+        self.lock_timeout_ms = lock_timeout_ms
+        self._task: asyncio.Task | None = None
+
+    async def maintain(self) -> None:
+        async with self.engine.connect() as connection:
+            locked = await connection.scalar(
+                text("SELECT pg_try_advisory_lock(:lock_id)"),
+                {"lock_id": EVENT_PARTITIONS_LOCK_ID},
+            )
+            await connection.commit()
+            if not locked:
+                return
+            try:
+                current_day = await connection.scalar(
+                    text('SELECT max("current_date") FROM "current_date"')
+                )
+                await connection.commit()
+                for table in self.tables:
+                    for start in await self._get_starts(
+                        table=table, current_day=current_day, connection=connection
+                    ):
+                        await self._create_partition(
+                            table=table, start=start, connection=connection
+                        )
+            finally:
+                await connection.execute(
+                    text("SELECT pg_advisory_unlock(:lock_id)"),
+                    {"lock_id": EVENT_PARTITIONS_LOCK_ID},
+                )
+                await connection.commit()
+
+    async def _get_starts(
+        self, table: str, current_day: int | None, connection: AsyncConnection
+    ) -> list[int]:
+        size = self.partition_size
+        result = await connection.execute(
+            text(f"SELECT DISTINCT date / {size} * {size} FROM {table}_default")
+        )
+        starts = set(result.scalars().all())
+        await connection.commit()
+        if current_day is not None:
+            first_start = current_day // size * size
+            starts.update(
+                first_start + size * offset for offset in range(self.lookahead + 1)
+            )
+        return sorted(starts)
+
+    async def _create_partition(
+        self, table: str, start: int, connection: AsyncConnection
+    ) -> None:
+        partition = f"{table}_p{start}"
+        try:
+            exists = await connection.scalar(
+                text("SELECT to_regclass(:partition)"), {"partition": partition}
+            )
+            if exists is None:
+                await connection.execute(
+                    text(f"SET LOCAL lock_timeout = {self.lock_timeout_ms}")
+                )
+                await connection.execute(
+                    text(
+                        f"CREATE TABLE {partition} "
+                        f"(LIKE {table} INCLUDING DEFAULTS)"
+                    )
+                )
+                await connection.execute(
+                    text(
+                        f"WITH moved AS (DELETE FROM {table}_default "
+                        f"WHERE date >= {start} AND date < {start + self.partition_size} "
+                        f"RETURNING *) INSERT INTO {partition} SELECT * FROM moved"
+                    )
+                )
+                await connection.execute(
+                    text(
+                        f"ALTER TABLE {table} ATTACH PARTITION {partition} "
+                        f"FOR VALUES FROM ({start}) TO ({start + self.partition_size})"
+                    )
+                )
+            await connection.commit()
+        except DBAPIError:
+            await connection.rollback()
+            logger.warning(
+                "Events for %s stay in the default partition", partition, exc_info=True
+            )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.maintain()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event partition maintenance failed")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+event_partition_maintainer = EventPartitionMaintainer(
+    engine=postgres_helper.engine,
+    tables=("unique_impressions", "unique_clicks"),
+    partition_size=settings.event_partition_size,
+    lookahead=settings.event_partition_lookahead,
+    interval=settings.event_partition_maintenance_interval,
+    lock_timeout_ms=settings.event_partition_lock_timeout_ms,
+)
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Callable
+
+import psycopg
+from psycopg import sql
+from sqlalchemy.engine import make_url
+
+from src.core.data import settings
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationListener:
+    def __init__(self, url: str, reconnect_delay: float = 1.0):
+        self.conninfo = (
+            make_url(url)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        self.reconnect_delay = reconnect_delay
+        self.handlers: dict[str, list[Callable[[str | None], None]]] = {}
+        self._task: asyncio.Task | None = None
+
+    def add_handler(self, channel: str, handler: Callable[[str | None], None]):
+        self.handlers.setdefault(channel, []).append(handler)
+
+    def _dispatch(self, channel: str, payload: str | None) -> None:
+        for handler in self.handlers.get(channel, []):
+            handler(payload)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self.conninfo,
+                    autocommit=True,
+                ) as connection:
+                    for channel in self.handlers:
+                        await connection.execute(
+                            sql.SQL("LISTEN {}").format(sql.Identifier(channel))
+                        )
+                    for channel in self.handlers:
+                        self._dispatch(channel, None)
+                    async for notification in connection.notifies():
+                        self._dispatch(notification.channel, notification.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification listener disconnected")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+notification_listener = NotificationListener(url=settings.db_url)
@@ -8,14 +8,24 @@ __all__ = (
     "CurrentDate",
     "UniqueImpression",
     "UniqueClick",
+    "CampaignCounter",
+    "MLScoreState",
+    "CampaignDailyStat",
+    "AdvertiserDailyStat",
+    "CampaignDailyReach",
 )
 
 from src.core.database.models.advertiser import Advertiser
+from src.core.database.models.advertiser_daily_stat import AdvertiserDailyStat
 from src.core.database.models.base import Base
 from src.core.database.models.campaign import Campaign
+from src.core.database.models.campaign_counter import CampaignCounter
+from src.core.database.models.campaign_daily_reach import CampaignDailyReach
+from src.core.database.models.campaign_daily_stat import CampaignDailyStat
 from src.core.database.models.click import UniqueClick
 from src.core.database.models.client import Client
 from src.core.database.models.current_date import CurrentDate
 from src.core.database.models.impression import UniqueImpression
 from src.core.database.models.ml_score import MLScore
+from src.core.database.models.ml_score_state import MLScoreState
 from src.core.database.models.targeting import Targeting
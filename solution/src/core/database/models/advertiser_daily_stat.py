@@ -0,0 +1,18 @@
+from uuid import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey
+from src.core.database.models.base import Base
+
+
+class AdvertiserDailyStat(Base):
+    __tablename__ = "advertiser_daily_stats"
+
+    id = None
+    advertiser_id: Mapped[UUID] = mapped_column(
+        ForeignKey("advertisers.id"), primary_key=True
+    )
+    date: Mapped[int] = mapped_column(primary_key=True)
+    impressions_count: Mapped[int] = mapped_column(server_default="0")
+    clicks_count: Mapped[int] = mapped_column(server_default="0")
+    spent_impressions: Mapped[float] = mapped_column(server_default="0")
+    spent_clicks: Mapped[float] = mapped_column(server_default="0")
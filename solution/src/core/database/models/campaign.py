@@ -1,5 +1,5 @@
 from uuid import UUID, uuid4
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -25,6 +25,15 @@ class Campaign(Base):
     is_deleted: Mapped[bool] = mapped_column(default=False, nullable=True)
     files: Mapped[list[str]] = mapped_column(JSON, nullable=True)
 
+    __table_args__ = (
+        Index(
+            "ix_campaigns_active_dates",
+            "start_date",
+            "end_date",
+            postgresql_where=text("is_deleted = false"),
+        ),
+    )
+
     advertiser: Mapped["Advertiser"] = relationship(
         "Advertiser",
         back_populates="campaigns",
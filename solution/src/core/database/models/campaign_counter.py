@@ -0,0 +1,17 @@
+from uuid import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey
+from src.core.database.models.base import Base
+
+
+class CampaignCounter(Base):
+    __tablename__ = "campaign_counters"
+
+    id = None
+    campaign_id: Mapped[UUID] = mapped_column(
+        ForeignKey("campaigns.id"), primary_key=True
+    )
+    impressions_count: Mapped[int] = mapped_column(server_default="0")
+    clicks_count: Mapped[int] = mapped_column(server_default="0")
+    spent_impressions: Mapped[float] = mapped_column(server_default="0")
+    spent_clicks: Mapped[float] = mapped_column(server_default="0")
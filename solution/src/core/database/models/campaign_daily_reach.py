@@ -0,0 +1,16 @@
+from uuid import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, LargeBinary
+from src.core.database.models.base import Base
+
+
+class CampaignDailyReach(Base):
+    __tablename__ = "campaign_daily_reach"
+
+    id = None
+    campaign_id: Mapped[UUID] = mapped_column(
+        ForeignKey("campaigns.id"), primary_key=True
+    )
+    date: Mapped[int] = mapped_column(primary_key=True)
+    impressions_sketch: Mapped[bytes] = mapped_column(LargeBinary, server_default="")
+    clicks_sketch: Mapped[bytes] = mapped_column(LargeBinary, server_default="")
@@ -0,0 +1,22 @@
+from uuid import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, Index
+from src.core.database.models.base import Base
+
+
+class CampaignDailyStat(Base):
+    __tablename__ = "campaign_daily_stats"
+
+    id = None
+    campaign_id: Mapped[UUID] = mapped_column(
+        ForeignKey("campaigns.id"), primary_key=True
+    )
+    date: Mapped[int] = mapped_column(primary_key=True)
+    impressions_count: Mapped[int] = mapped_column(server_default="0")
+    clicks_count: Mapped[int] = mapped_column(server_default="0")
+    spent_impressions: Mapped[float] = mapped_column(server_default="0")
+    spent_clicks: Mapped[float] = mapped_column(server_default="0")
+
+    __table_args__ = (
+        Index("ix_campaign_daily_stats_date_campaign_id", "date", "campaign_id"),
+    )
@@ -1,6 +1,6 @@
 from uuid import UUID
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from src.core.database.models.base import Base
 
 
@@ -13,3 +13,14 @@ class UniqueClick(Base):
     )
     cost: Mapped[float]
     date: Mapped[int] = mapped_column(primary_key=True)
+
+    __table_args__ = (
+        Index(
+            "ix_unique_clicks_campaign_id_date",
+            "campaign_id",
+            "date",
+            postgresql_include=["cost"],
+        ),
+        Index("ix_unique_clicks_client_id_campaign_id", "client_id", "campaign_id"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
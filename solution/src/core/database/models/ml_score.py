@@ -10,7 +10,11 @@ class MLScore(Base):
         ForeignKey("advertisers.id"), nullable=False
     )
     score: Mapped[float] = mapped_column(nullable=False)
+    version: Mapped[int] = mapped_column(primary_key=True, server_default="0")
 
     __table_args__ = (
-        UniqueConstraint("client_id", "advertiser_id", name="uix_client_advertiser"),
+        UniqueConstraint(
+            "version", "client_id", "advertiser_id", name="uix_client_advertiser"
+        ),
+        {"postgresql_partition_by": "LIST (version)"},
     )
@@ -0,0 +1,16 @@
+from sqlalchemy import CheckConstraint, UniqueConstraint, true
+from sqlalchemy.orm import Mapped, mapped_column
+from src.core.database.models.base import Base
+
+
+class MLScoreState(Base):
+    __tablename__ = "ml_score_state"
+
+    max_score: Mapped[float] = mapped_column(nullable=True)
+    active_version: Mapped[int] = mapped_column(server_default="0")
+    singleton: Mapped[bool] = mapped_column(server_default=true())
+
+    __table_args__ = (
+        UniqueConstraint("singleton", name="uq_ml_score_state_singleton"),
+        CheckConstraint("singleton", name="ck_ml_score_state_singleton"),
+    )
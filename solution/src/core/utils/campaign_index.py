@@ -0,0 +1,145 @@
+import time
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.data import settings
+from src.core.database import models
+from src.core.utils import enums
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedTargeting:
+    age_from: int | None
+    age_to: int | None
+
+    def matches_age(self, age: int) -> bool:
+        if self.age_from is not None and self.age_from > age:
+            return False
+        if self.age_to is not None and self.age_to < age:
+            return False
+        return True
+
+
+class CampaignIndex:
+    def __init__(self, age_bucket_size: int, max_age: int, ttl: float):
+        self.age_bucket_size = age_bucket_size
+        self.max_age = max_age
+        self.ttl = ttl
+
+        self._generation = 0
+        self._built_generation = -1
+        self._built_for_day: int | None = None
+        self._built_at = 0.0
+
+        self._targetings: dict[UUID, IndexedTargeting] = {}
+        self._by_gender: dict[enums.GenderEnum, set[UUID]] = {}
+        self._by_location: dict[str, set[UUID]] = {}
+        self._any_location: set[UUID] = set()
+        self._by_age_bucket: list[set[UUID]] = []
+
+    def invalidate(self) -> None:
+        self._generation += 1
+
+    def is_stale(self, current_day: int) -> bool:
+        return (
+            self._built_generation != self._generation
+            or self._built_for_day != current_day
+            or time.monotonic() - self._built_at > self.ttl
+        )
+
+    def _age_bucket(self, age: int) -> int:
+        return min(age, self.max_age) // self.age_bucket_size
+
+    async def rebuild(self, current_day: int, session: AsyncSession) -> None:
+        generation = self._generation
+        result = await session.execute(
+            select(
+                models.Campaign.campaign_id,
+                models.Targeting.gender,
+                models.Targeting.age_from,
+                models.Targeting.age_to,
+                models.Targeting.location,
+            )
+            .join(
+                models.Targeting,
+                models.Targeting.campaign_id == models.Campaign.campaign_id,
+            )
+            .where(
+                models.Campaign.start_date <= current_day,
+                models.Campaign.end_date >= current_day,
+                models.Campaign.is_deleted == False,
+            )
+        )
+
+        targetings = {}
+        by_gender = {gender: set() for gender in enums.GenderEnum}
+        by_location = {}
+        any_location = set()
+        by_age_bucket = [set() for _ in range(self._age_bucket(self.max_age) + 1)]
+
+        for campaign_id, gender, age_from, age_to, location in result.all():
+            targetings[campaign_id] = IndexedTargeting(age_from=age_from, age_to=age_to)
+
+            if gender is None or gender == enums.ExtendedGenderEnum.ALL:
+                for gender_campaigns in by_gender.values():
+                    gender_campaigns.add(campaign_id)
+            else:
+                by_gender[enums.GenderEnum(gender.value)].add(campaign_id)
+
+            if location is None:
+                any_location.add(campaign_id)
+            else:
+                by_location.setdefault(location, set()).add(campaign_id)
+
+            first_bucket = self._age_bucket(age_from or 0)
+            last_bucket = self._age_bucket(self.max_age if age_to is None else age_to)
+            for bucket in range(first_bucket, last_bucket + 1):
+                by_age_bucket[bucket].add(campaign_id)
+
+        self._targetings = targetings
+        self._by_gender = by_gender
+        self._by_location = by_location
+        self._any_location = any_location
+        self._by_age_bucket = by_age_bucket
+        self._built_generation = generation
+        self._built_for_day = current_day
+        self._built_at = time.monotonic()
+
+    async def get_candidates(
+        self,
+        gender: enums.GenderEnum,
+        age: int,
+        location: str,
+        current_day: int,
+        session: AsyncSession,
+    ) -> set[UUID]:
+        if self.is_stale(current_day):
+            await self.rebuild(current_day=current_day, session=session)
+
+        gender_campaigns = self._by_gender[gender]
+        age_campaigns = self._by_age_bucket[self._age_bucket(age)]
+        candidates = set()
+        for location_campaigns in (
+            self._by_location.get(location, set()),
+            self._any_location,
+        ):
+            smallest, *others = sorted(
+                (location_campaigns, gender_campaigns, age_campaigns),
+                key=len,
+            )
+            candidates.update(
+                campaign_id
+                for campaign_id in smallest.intersection(*others)
+                if self._targetings[campaign_id].matches_age(age)
+            )
+        return candidates
+
+
+campaign_index = CampaignIndex(
+    age_bucket_size=settings.campaign_index_age_bucket_size,
+    max_age=settings.campaign_index_max_age,
+    ttl=settings.campaign_index_ttl,
+)
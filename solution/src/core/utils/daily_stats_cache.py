@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from src.core.data import settings
+
+
+class DailyStatsCache:
+    def __init__(self, max_days: int):
+        self.max_days = max_days
+        self.hits = 0
+        self.misses = 0
+        self._current_day: int | None = None
+        self._size = 0
+        self._data: OrderedDict[Hashable, tuple[int, list[Any]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def set_current_day(self, current_day: int | None) -> None:
+        if (
+            current_day is None
+            or self._current_day is None
+            or current_day < self._current_day
+        ):
+            self.clear()
+        self._current_day = current_day
+
+    def get(self, key: Hashable, current_day: int) -> tuple[list[Any], int | None]:
+        if current_day != self._current_day:
+            self.set_current_day(current_day)
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return [], None
+        self._data.move_to_end(key)
+        self.hits += 1
+        cached_until, days = entry
+        return days, cached_until
+
+    def extend(
+        self,
+        key: Hashable,
+        days: list[Any],
+        cached_from: int | None,
+        cached_until: int,
+    ) -> None:
+        if cached_until != self._current_day:
+            return
+        entry_cached_until, cached_days = self._data.get(key, (None, []))
+        if entry_cached_until != cached_from:
+            return
+        self._data[key] = (cached_until, cached_days + days)
+        self._data.move_to_end(key)
+        self._size += len(days)
+        while self._size > self.max_days and self._data:
+            _, (_, evicted_days) = self._data.popitem(last=False)
+            self._size -= len(evicted_days)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._size = 0
+
+
+daily_stats_cache = DailyStatsCache(max_days=settings.daily_stats_cache_max_days)
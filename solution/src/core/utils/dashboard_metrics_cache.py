@@ -0,0 +1,6 @@
+from src.core.data import settings
+from src.core.utils.ttl_cache import TTLCache
+
+dashboard_metrics_cache = TTLCache(
+    maxsize=settings.dashboard_metrics_cache_size, ttl=settings.dashboard_metrics_ttl
+)
@@ -1,6 +1,10 @@
 __all__ = (
     "GenderEnum",
     "ExtendedGenderEnum",
+    "ExportFormatEnum",
+    "EventTypeEnum",
 )
 
+from src.core.utils.enums.event_type_enum import EventTypeEnum
+from src.core.utils.enums.export_format_enum import ExportFormatEnum
 from src.core.utils.enums.gender_enum import GenderEnum, ExtendedGenderEnum
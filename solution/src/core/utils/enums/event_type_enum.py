@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class EventTypeEnum(str, Enum):
+    IMPRESSION = "impression"
+    CLICK = "click"
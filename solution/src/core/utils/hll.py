@@ -0,0 +1,28 @@
+import math
+from typing import Iterable
+
+HLL_REGISTERS = 1024
+HLL_RANK_BITS = 6
+
+
+def merge_sketches(sketches: Iterable[bytes]) -> bytearray:
+    registers = bytearray(HLL_REGISTERS)
+    rank_mask = (1 << HLL_RANK_BITS) - 1
+    for sketch in sketches:
+        if len(sketch) == HLL_REGISTERS:
+            registers = bytearray(map(max, registers, sketch))
+            continue
+        for offset in range(0, len(sketch), 2):
+            entry = sketch[offset] << 8 | sketch[offset + 1]
+            register = entry >> HLL_RANK_BITS
+            registers[register] = max(registers[register], entry & rank_mask)
+    return registers
+
+
+def estimate_cardinality(registers: bytearray) -> int:
+    alpha = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+    estimate = alpha * HLL_REGISTERS**2 / sum(2.0**-register for register in registers)
+    empty_registers = registers.count(0)
+    if estimate <= 2.5 * HLL_REGISTERS and empty_registers:
+        estimate = HLL_REGISTERS * math.log(HLL_REGISTERS / empty_registers)
+    return round(estimate)
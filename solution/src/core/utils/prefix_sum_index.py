@@ -0,0 +1,111 @@
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+from src.core.data import settings
+
+
+@dataclass(slots=True)
+class PrefixSums:
+    cached_until: int
+    days: array
+    sums: dict[str, array]
+
+    def __len__(self) -> int:
+        return len(self.days) + 1
+
+    def get_total(self, column: str, until_day: int) -> float:
+        index = bisect_left(self.days, until_day)
+        if index == 0:
+            return 0
+        return self.sums[column][index - 1]
+
+    def get_range(self, column: str, from_day: int, to_day: int) -> float:
+        if from_day > to_day:
+            return 0
+        return self.get_total(column, to_day + 1) - self.get_total(column, from_day)
+
+
+class PrefixSumIndex:
+    def __init__(self, columns: list[str], max_days: int):
+        self.columns = columns
+        self.max_days = max_days
+        self._current_day: int | None = None
+        self._size = 0
+        self._data: OrderedDict[Hashable, PrefixSums] = OrderedDict()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def set_current_day(self, current_day: int | None) -> None:
+        if (
+            current_day is None
+            or self._current_day is None
+            or current_day < self._current_day
+        ):
+            self.clear()
+        self._current_day = current_day
+
+    def get(self, key: Hashable, current_day: int) -> PrefixSums | None:
+        if current_day != self._current_day:
+            self.set_current_day(current_day)
+        prefix_sums = self._data.get(key)
+        if prefix_sums is not None:
+            self._data.move_to_end(key)
+        return prefix_sums
+
+    def extend(
+        self,
+        key: Hashable,
+        days: list[Any],
+        cached_from: int | None,
+        cached_until: int,
+    ) -> None:
+        if cached_until != self._current_day:
+            return
+        prefix_sums = self._data.get(key)
+        if (None if prefix_sums is None else prefix_sums.cached_until) != cached_from:
+            return
+        if prefix_sums is None:
+            prefix_sums = PrefixSums(
+                cached_until=cached_until,
+                days=array("q"),
+                sums={column: array("d") for column in self.columns},
+            )
+
+        size = len(prefix_sums) if key in self._data else 0
+        if len(prefix_sums) + len(days) > self.max_days:
+            self._data.pop(key, None)
+            self._size -= size
+            return
+        for column, sums in prefix_sums.sums.items():
+            total = sums[-1] if sums else 0.0
+            for day_data in days:
+                total += getattr(day_data, column)
+                sums.append(total)
+        prefix_sums.days.extend(day_data.date for day_data in days)
+        prefix_sums.cached_until = cached_until
+
+        self._data[key] = prefix_sums
+        self._data.move_to_end(key)
+        self._size += len(prefix_sums) - size
+        while self._size > self.max_days and self._data:
+            _, evicted = self._data.popitem(last=False)
+            self._size -= len(evicted)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._size = 0
+
+
+prefix_sum_index = PrefixSumIndex(
+    columns=[
+        "impressions_count",
+        "clicks_count",
+        "spent_impressions",
+        "spent_clicks",
+    ],
+    max_days=settings.prefix_sum_index_max_days,
+)
@@ -0,0 +1,34 @@
+import csv
+import io
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+
+from src.core.utils import enums
+
+MEDIA_TYPES = {
+    enums.ExportFormatEnum.NDJSON: "application/x-ndjson",
+    enums.ExportFormatEnum.CSV: "text/csv",
+}
+
+
+async def encode_batches(
+    batches: AsyncIterator[list[BaseModel]],
+    schema: type[BaseModel],
+    export_format: enums.ExportFormatEnum,
+) -> AsyncIterator[str]:
+    if export_format == enums.ExportFormatEnum.NDJSON:
+        async for batch in batches:
+            yield "".join(f"{item.model_dump_json()}\n" for item in batch)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(schema.model_fields))
+    writer.writeheader()
+    async for batch in batches:
+        writer.writerows(item.model_dump(mode="json") for item in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
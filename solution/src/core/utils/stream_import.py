@@ -0,0 +1,161 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator
+
+from pydantic import BaseModel, NonNegativeInt, ValidationError
+
+from src.core.data import settings
+from src.core.utils import enums
+
+
+class RowError(BaseModel):
+    row: NonNegativeInt
+    errors: list[str]
+
+
+class ImportReport(BaseModel):
+    rows_total: NonNegativeInt = 0
+    rows_loaded: NonNegativeInt = 0
+    rows_failed: NonNegativeInt = 0
+    errors: list[RowError] = []
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[str | None, str | None]]:
+    max_length = settings.import_max_line_length
+    pending = b""
+    skipping = False
+    first = True
+    async for chunk in chunks:
+        if first:
+            chunk = chunk.removeprefix(codecs.BOM_UTF8)
+            first = False
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            yield decode_line(line)
+        if len(pending) > max_length:
+            if not skipping:
+                yield None, f"Строка длиннее {max_length} байт"
+            pending = b""
+            skipping = True
+    if pending and not skipping:
+        yield decode_line(pending)
+
+
+def decode_line(line: bytes) -> tuple[str | None, str | None]:
+    try:
+        return line.decode("utf-8"), None
+    except UnicodeDecodeError as error:
+        return None, f"Некорректная кодировка UTF-8: {error.reason}"
+
+
+def ends_in_quotes(line: str, in_quotes: bool) -> bool:
+    index = 0
+    while (quote := line.find('"', index)) != -1:
+        if in_quotes:
+            if line.startswith('"', quote + 1):
+                quote += 1
+            else:
+                in_quotes = False
+        elif quote == 0 or line[quote - 1] == ",":
+            in_quotes = True
+        index = quote + 1
+    return in_quotes
+
+
+async def parse_records(
+    chunks: AsyncIterator[bytes],
+    import_format: enums.ExportFormatEnum,
+) -> AsyncIterator[tuple[int, dict[str, Any] | None, str | None]]:
+    row = 0
+    if import_format == enums.ExportFormatEnum.NDJSON:
+        async for line, error in iter_lines(chunks):
+            if error is None and not line.strip():
+                continue
+            row += 1
+            if error is not None:
+                yield row, None, error
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield row, None, f"Некорректный JSON: {error}"
+                continue
+            if not isinstance(data, dict):
+                yield row, None, "Ожидался JSON-объект"
+                continue
+            yield row, data, None
+        return
+
+    max_length = settings.import_max_line_length
+    header = None
+    record = ""
+    in_quotes = False
+    async for line, error in iter_lines(chunks):
+        if error is None and len(record) + len(line) > max_length:
+            error = f"Запись длиннее {max_length} символов (незакрытые кавычки?)"
+        if error is not None:
+            record = ""
+            in_quotes = False
+            if header is not None:
+                row += 1
+            yield row, None, error
+            continue
+        record = f"{record}\n{line}" if record else line
+        in_quotes = ends_in_quotes(line, in_quotes)
+        if in_quotes:
+            continue
+        values = next(csv.reader([record]))
+        record = ""
+        if not values:
+            continue
+        if header is None:
+            header = values
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, None, (
+                f"Ожидалось колонок: {len(header)}, получено: {len(values)}"
+            )
+            continue
+        yield row, dict(zip(header, values)), None
+    if record:
+        yield row + 1, None, "Незакрытые кавычки в конце файла"
+
+
+async def validate_batches(
+    records: AsyncIterator[tuple[int, dict[str, Any] | None, str | None]],
+    schema: type[BaseModel],
+    batch_size: int,
+    max_errors: int,
+    report: ImportReport,
+) -> AsyncIterator[list[tuple[int, BaseModel]]]:
+    batch = []
+    async for row, data, error in records:
+        report.rows_total += 1
+        errors = [] if error is None else [error]
+        if not errors:
+            try:
+                batch.append((row, schema.model_validate(data)))
+            except ValidationError as validation_error:
+                errors = [
+                    f"{'.'.join(map(str, details['loc']))}: {details['msg']}"
+                    for details in validation_error.errors()
+                ]
+        if errors:
+            report.rows_failed += 1
+            if len(report.errors) < max_errors:
+                report.errors.append(RowError(row=row, errors=errors))
+            continue
+        if len(batch) >= batch_size:
+            report.rows_loaded += len(batch)
+            yield batch
+            batch = []
+    if batch:
+        report.rows_loaded += len(batch)
+        yield batch
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        flush: Callable[[list[Any]], Awaitable[None]],
+        batch_size: int,
+        flush_interval: float,
+        max_size: int,
+        retry_interval: float,
+        max_retry_interval: float,
+        block_when_full: bool = False,
+        data_errors: tuple[type[Exception], ...] = (),
+    ):
+        self._flush = flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.block_when_full = block_when_full
+        self.data_errors = data_errors
+        self.dropped = 0
+        self._entries: list[tuple[Hashable, Any]] = []
+        self._keys: set[Hashable] = set()
+        self._flushing_keys: set[Hashable] = set()
+        self._failures = 0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._keys or key in self._flushing_keys
+
+    @property
+    def retry_delay(self) -> float:
+        if not self._failures:
+            return self.flush_interval
+        return min(
+            self.retry_interval * 2 ** (self._failures - 1), self.max_retry_interval
+        )
+
+    async def add(self, key: Hashable, item: Any) -> None:
+        if len(self._entries) >= self.max_size:
+            await self._make_room()
+        self._entries.append((key, item))
+        self._keys.add(key)
+        if len(self._entries) >= self.batch_size:
+            await self.flush()
+
+    async def _make_room(self) -> None:
+        while not await self.flush() and self.block_when_full:
+            await asyncio.sleep(self.retry_delay)
+        overflow = len(self._entries) - self.max_size + 1
+        if overflow > 0:
+            self._drop(self._entries[:overflow])
+            del self._entries[:overflow]
+            self._keys = {key for key, _ in self._entries}
+
+    async def flush(self) -> bool:
+        async with self._lock:
+            if not self._entries:
+                return True
+            entries = self._entries
+            self._entries, self._keys, self._flushing_keys = [], set(), self._keys
+            try:
+                unwritten = await self._write(entries)
+            except BaseException:
+                unwritten = entries
+                raise
+            finally:
+                self._entries = unwritten + self._entries
+                self._keys = {key for key, _ in self._entries}
+                self._flushing_keys = set()
+            if unwritten:
+                self._failures += 1
+                return False
+            self._failures = 0
+            return True
+
+    async def _write(
+        self, entries: list[tuple[Hashable, Any]]
+    ) -> list[tuple[Hashable, Any]]:
+        try:
+            await self._flush([item for _, item in entries])
+        except self.data_errors:
+            if len(entries) == 1:
+                self._drop(entries)
+                return []
+            middle = len(entries) // 2
+            unwritten = await self._write(entries[:middle])
+            if unwritten:
+                return unwritten + entries[middle:]
+            return await self._write(entries[middle:])
+        except Exception:
+            logger.warning(
+                "Failed to flush %d buffered items, will retry",
+                len(entries),
+                exc_info=True,
+            )
+            return entries
+        return []
+
+    def _drop(self, entries: list[tuple[Hashable, Any]]) -> None:
+        self.dropped += len(entries)
+        logger.error(
+            "Dropped %d buffered items: %r",
+            len(entries),
+            [item for _, item in entries],
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.retry_delay)
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while not await self.flush():
+            if not self.block_when_full:
+                self._drop(self._entries)
+                self._entries, self._keys = [], set()
+                return
+            await asyncio.sleep(self.retry_delay)
@@ -13,6 +13,11 @@ from src.api_v1.stats.routes import router as stats_router
 from src.api_v1.time.routes import router as time_router
 from src.api_v1.ml.routes import router as ml_router
 from src.api_v1.files.routes import router as files_router
+from src.api_v1.ads import crud as ads_crud
+from src.api_v1.stats import crud as stats_crud
+from src.api_v1.time import crud as time_crud
+from src.core.data import settings
+from src.core.database import event_partition_maintainer, notification_listener
 
 
 MultiPartParser.max_file_size = 10 * 1024 * 1024
@@ -20,7 +25,22 @@ MultiPartParser.max_file_size = 10 * 1024 * 1024
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    notification_listener.add_handler(
+        time_crud.CURRENT_DATE_CHANNEL,
+        time_crud.handle_current_date_notification,
+    )
+    notification_listener.add_handler(
+        stats_crud.DAILY_STATS_CHANNEL,
+        stats_crud.handle_daily_stats_notification,
+    )
+    await notification_listener.start()
+    await event_partition_maintainer.start()
+    if settings.impression_write_behind:
+        await ads_crud.impression_buffer.start()
     yield
+    await ads_crud.impression_buffer.stop()
+    await event_partition_maintainer.stop()
+    await notification_listener.stop()
 
 
 app = FastAPI(
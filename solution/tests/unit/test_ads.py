@@ -1,8 +1,13 @@
+import asyncio
+
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
 from src.main import app
-from uuid import UUID
+from src.api_v1.ads import crud as ads_crud
+from src.core.data import settings
+from src.core.utils.write_behind_buffer import WriteBehindBuffer
+from uuid import UUID, uuid4
 
 client = TestClient(app)
 
@@ -84,3 +89,266 @@ def test_click_on_ad(sample_client, sample_advertiser, sample_campaign):
         f"/ads/{ad_response['ad_id']}/click", json={"client_id": client_id}
     )
     assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_click_counts_once_and_requires_impression(sample_advertiser, sample_campaign):
+    location = str(uuid4())
+    clients = [
+        {
+            "client_id": str(uuid4()),
+            "login": "test_user",
+            "age": 25,
+            "location": location,
+            "gender": "MALE",
+        }
+        for _ in range(2)
+    ]
+    client.post("/clients/bulk", json=clients)
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    sample_campaign["targeting"]["location"] = location
+    campaign_id = client.post(
+        f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+    ).json()["campaign_id"]
+    client.post("/time/advance", json={"current_date": 1})
+
+    shown_client_id = clients[0]["client_id"]
+    client.get(f"/ads?client_id={shown_client_id}")
+    for client_id in (shown_client_id, shown_client_id, clients[1]["client_id"]):
+        response = client.post(
+            f"/ads/{campaign_id}/click", json={"client_id": client_id}
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.post(f"/ads/{uuid4()}/click", json={"client_id": shown_client_id})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    response = client.post(
+        f"/ads/{campaign_id}/click", json={"client_id": str(uuid4())}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.get(f"/stats/campaigns/{campaign_id}")
+    assert response.json()["clicks_count"] == 1
+    assert response.json()["spent_clicks"] == sample_campaign["cost_per_click"]
+
+
+def test_ad_follows_campaign_targeting_changes(sample_advertiser, sample_campaign):
+    location = str(uuid4())
+    targeted_client = {
+        "client_id": str(uuid4()),
+        "login": "test_user",
+        "age": 25,
+        "location": location,
+        "gender": "FEMALE",
+    }
+    client.post("/clients/bulk", json=[targeted_client])
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    client.post("/time/advance", json={"current_date": 1})
+
+    client_id = targeted_client["client_id"]
+    response = client.get(f"/ads?client_id={client_id}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    sample_campaign["targeting"]["location"] = location
+    response = client.post(
+        f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    campaign_id = response.json()["campaign_id"]
+
+    response = client.get(f"/ads?client_id={client_id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["ad_id"] == campaign_id
+
+    response = client.put(
+        f"/advertisers/{advertiser_id}/campaigns/{campaign_id}",
+        json={"targeting": {"gender": "MALE", "location": location}},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get(f"/ads?client_id={client_id}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_ad_respects_impressions_limit(sample_advertiser, sample_campaign):
+    location = str(uuid4())
+    clients = [
+        {
+            "client_id": str(uuid4()),
+            "login": f"user_{i}",
+            "age": 25,
+            "location": location,
+            "gender": "MALE",
+        }
+        for i in range(2)
+    ]
+    client.post("/clients/bulk", json=clients)
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    sample_campaign["impressions_limit"] = 1
+    sample_campaign["clicks_limit"] = 1
+    sample_campaign["targeting"]["location"] = location
+    response = client.post(
+        f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+    )
+    campaign_id = response.json()["campaign_id"]
+    client.post("/time/advance", json={"current_date": 1})
+
+    response = client.get(f"/ads?client_id={clients[0]['client_id']}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["ad_id"] == campaign_id
+
+    response = client.get(f"/ads?client_id={clients[1]['client_id']}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.get(f"/stats/campaigns/{campaign_id}")
+    assert response.json()["impressions_count"] == 1
+
+
+def test_get_ads_batch(sample_advertiser, sample_campaign):
+    location = str(uuid4())
+    clients = [
+        {
+            "client_id": str(uuid4()),
+            "login": f"user_{i}",
+            "age": 25,
+            "location": location,
+            "gender": "MALE",
+        }
+        for i in range(3)
+    ]
+    client.post("/clients/bulk", json=clients)
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    sample_campaign["targeting"]["location"] = location
+    sample_campaign["impressions_limit"] = 2
+    sample_campaign["clicks_limit"] = 2
+    sample_campaign["cost_per_impression"] = 10
+    limited_campaign_id = client.post(
+        f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+    ).json()["campaign_id"]
+    sample_campaign["impressions_limit"] = 10
+    sample_campaign["cost_per_impression"] = 1
+    fallback_campaign_id = client.post(
+        f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+    ).json()["campaign_id"]
+    client.post("/time/advance", json={"current_date": 1})
+
+    missing_client_id = str(uuid4())
+    client_ids = [client_data["client_id"] for client_data in clients]
+    response = client.post(
+        "/ads/batch", json={"client_ids": client_ids + [missing_client_id]}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    ads = response.json()
+    assert [ad["client_id"] for ad in ads] == client_ids + [missing_client_id]
+    assert ads[0]["ad"]["ad_id"] == limited_campaign_id
+    assert ads[1]["ad"]["ad_id"] == limited_campaign_id
+    assert ads[2]["ad"]["ad_id"] == fallback_campaign_id
+    assert ads[3]["ad"] is None
+
+    response = client.get(f"/stats/campaigns/{limited_campaign_id}")
+    assert response.json()["impressions_count"] == 2
+
+
+def test_ad_impressions_write_behind(monkeypatch, sample_advertiser, sample_campaign):
+    monkeypatch.setattr(settings, "impression_write_behind", True)
+    location = str(uuid4())
+    buffered_client = {
+        "client_id": str(uuid4()),
+        "login": "test_user",
+        "age": 25,
+        "location": location,
+        "gender": "MALE",
+    }
+    client.post("/clients/bulk", json=[buffered_client])
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    sample_campaign["targeting"]["location"] = location
+    campaign_id = client.post(
+        f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+    ).json()["campaign_id"]
+    client.post("/time/advance", json={"current_date": 1})
+
+    client_id = buffered_client["client_id"]
+    response = client.get(f"/ads?client_id={client_id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert (UUID(client_id), UUID(campaign_id)) in ads_crud.impression_buffer
+    response = client.get(f"/stats/campaigns/{campaign_id}")
+    assert response.json()["impressions_count"] == 0
+
+    response = client.post(f"/ads/{campaign_id}/click", json={"client_id": client_id})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    response = client.get(f"/stats/campaigns/{campaign_id}")
+    assert response.json()["impressions_count"] == 1
+    assert response.json()["clicks_count"] == 1
+
+
+async def test_write_behind_buffer_keeps_keys_until_flush_commits():
+    written = []
+    release = asyncio.Event()
+
+    async def flush(items):
+        await release.wait()
+        if "bad" in items:
+            raise ValueError("bad item")
+        written.extend(items)
+
+    buffer = WriteBehindBuffer(
+        flush=flush,
+        batch_size=10,
+        flush_interval=1,
+        max_size=10,
+        retry_interval=0.01,
+        max_retry_interval=0.1,
+        data_errors=(ValueError,),
+    )
+    for key in ("a", "bad", "b"):
+        await buffer.add(key=key, item=key)
+    flush_task = asyncio.create_task(buffer.flush())
+    await asyncio.sleep(0)
+    assert "a" in buffer
+    assert len(buffer) == 0
+
+    release.set()
+    await flush_task
+    assert "a" not in buffer
+    assert sorted(written) == ["a", "b"]
+    assert buffer.dropped == 1
+
+
+@pytest.mark.parametrize("block_when_full", [False, True])
+async def test_write_behind_buffer_retries_transient_failures(block_when_full):
+    written = []
+    failures = iter([True, True])
+
+    async def flush(items):
+        if next(failures, False):
+            raise ConnectionError("database is restarting")
+        written.extend(items)
+
+    buffer = WriteBehindBuffer(
+        flush=flush,
+        batch_size=10,
+        flush_interval=1,
+        max_size=2,
+        retry_interval=0.01,
+        max_retry_interval=0.1,
+        block_when_full=block_when_full,
+        data_errors=(ValueError,),
+    )
+    await buffer.add(key="a", item="a")
+    assert not await buffer.flush()
+    assert "a" in buffer
+    await buffer.add(key="b", item="b")
+    await buffer.add(key="c", item="c")
+
+    if block_when_full:
+        assert buffer.dropped == 0
+        assert written == ["a", "b"]
+    else:
+        assert buffer.dropped == 1
+        assert written == []
+    assert await buffer.flush()
+    assert written == (["a", "b", "c"] if block_when_full else ["b", "c"])
@@ -1,8 +1,10 @@
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from src.main import app
-from uuid import UUID
+from src.core.database import postgres_helper
+from uuid import UUID, uuid4
 
 client = TestClient(app)
 
@@ -47,3 +49,46 @@ def test_get_advertiser_not_found():
     response = client.get("/advertisers/00000000-0000-0000-0000-000000000000")
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert response.json() == {"detail": "Advertiser not found"}
+
+
+def test_bulk_upsert_is_one_statement(sample_advertiser):
+    advertiser = {**sample_advertiser, "advertiser_id": str(uuid4())}
+    client.post("/advertisers/bulk", json=[advertiser])
+    for _ in range(2):
+        client.post(
+            f"/advertisers/{advertiser['advertiser_id']}/campaigns",
+            json={
+                "impressions_limit": 10,
+                "clicks_limit": 5,
+                "cost_per_impression": 0.1,
+                "cost_per_click": 0.5,
+                "ad_title": "Title",
+                "ad_text": "Text",
+                "start_date": 1,
+                "end_date": 7,
+                "targeting": {"location": str(uuid4())},
+            },
+        )
+    renamed_advertiser = {**advertiser, "name": "Renamed Advertiser"}
+    new_advertiser = {**sample_advertiser, "advertiser_id": str(uuid4())}
+    payload = [renamed_advertiser, new_advertiser, renamed_advertiser]
+
+    statements = []
+    sync_engine = postgres_helper.engine.sync_engine
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = client.post("/advertisers/bulk", json=payload)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count_statement)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json() == payload
+    assert len(statements) == 1
+    response = client.get(f"/advertisers/{advertiser['advertiser_id']}")
+    assert response.json() == renamed_advertiser
+    response = client.get(f"/advertisers/{advertiser['advertiser_id']}/campaigns")
+    assert len(response.json()) == 2
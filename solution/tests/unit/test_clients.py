@@ -1,8 +1,10 @@
+import json
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
 from src.main import app
-from uuid import UUID
+from src.api_v1.clients import crud as clients_crud
+from uuid import UUID, uuid4
 
 client = TestClient(app)
 
@@ -58,3 +60,123 @@ def test_get_client_not_found():
     response = client.get("/clients/00000000-0000-0000-0000-000000000000")
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert response.json() == {"detail": "Client not found"}
+
+
+def test_only_ads_use_client_cache(sample_client):
+    client.post("/clients/bulk", json=[sample_client])
+    client_id = sample_client["client_id"]
+    client.get(f"/ads?client_id={client_id}")
+
+    hits = clients_crud.client_cache.hits
+    client.get(f"/ads?client_id={client_id}")
+    assert clients_crud.client_cache.hits == hits + 1
+
+    response = client.get(f"/clients/{client_id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert clients_crud.client_cache.hits == hits + 1
+
+    updated_client = {**sample_client, "location": "LA"}
+    client.post("/clients/bulk", json=[updated_client])
+    response = client.get(f"/clients/{client_id}")
+    assert response.json()["location"] == "LA"
+    cached_client = clients_crud.client_cache.get(UUID(client_id))
+    assert cached_client is None
+
+
+def test_bulk_upsert_mixes_new_and_existing_clients(sample_client, monkeypatch):
+    monkeypatch.setattr(clients_crud.settings, "clients_upsert_chunk_size", 2)
+    existing_client = {**sample_client, "client_id": str(uuid4())}
+    client.post("/clients/bulk", json=[existing_client])
+    new_clients = [
+        {**sample_client, "client_id": str(uuid4()), "login": f"user_{i}"}
+        for i in range(3)
+    ]
+    updated_client = {**existing_client, "age": 30}
+    payload = [new_clients[0], updated_client, *new_clients[1:], new_clients[0]]
+
+    response = client.post("/clients/bulk", json=payload)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json() == payload
+    for client_data in [updated_client, *new_clients]:
+        response = client.get(f"/clients/{client_data['client_id']}")
+        assert response.json() == client_data
+
+
+def test_upload_clients_csv_reports_row_errors():
+    client_ids = [str(uuid4()) for _ in range(3)]
+    lines = [
+        "client_id,login,age,location,gender",
+        f"{client_ids[0]},first,25,NYC,MALE",
+        f'{client_ids[1]},"multi, line\nlogin",30,LA,FEMALE',
+        f"{client_ids[2]},bad_age,-1,LA,FEMALE",
+        f"{client_ids[0]},first_updated,26,NYC,MALE",
+        "only,three,columns",
+    ]
+    chunks = [line.encode() for line in "\n".join(lines)]
+
+    response = client.post("/clients/upload?format=csv", content=iter(chunks))
+    assert response.status_code == status.HTTP_201_CREATED
+    report = response.json()
+    assert report["rows_total"] == 5
+    assert report["rows_loaded"] == 3
+    assert report["rows_failed"] == 2
+    assert [error["row"] for error in report["errors"]] == [3, 5]
+    assert report["errors"][0]["errors"][0].startswith("age:")
+
+    assert client.get(f"/clients/{client_ids[0]}").json()["login"] == "first_updated"
+    assert client.get(f"/clients/{client_ids[1]}").json()["login"] == (
+        "multi, line\nlogin"
+    )
+    response = client.get(f"/clients/{client_ids[2]}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_upload_clients_ndjson(sample_client, monkeypatch):
+    monkeypatch.setattr(clients_crud.settings, "clients_upload_batch_size", 2)
+    monkeypatch.setattr(clients_crud.settings, "clients_upload_max_errors", 1)
+    clients_data = [
+        {**sample_client, "client_id": str(uuid4()), "login": f"user_{i}"}
+        for i in range(5)
+    ]
+    body = "\n".join(
+        [*(json.dumps(client_data) for client_data in clients_data), "{", "[]", ""]
+    )
+
+    response = client.post("/clients/upload", content=body.encode())
+    assert response.status_code == status.HTTP_201_CREATED
+    report = response.json()
+    assert report["rows_total"] == 7
+    assert report["rows_loaded"] == 5
+    assert report["rows_failed"] == 2
+    assert len(report["errors"]) == 1
+    assert report["errors"][0]["row"] == 6
+    for client_data in clients_data:
+        response = client.get(f"/clients/{client_data['client_id']}")
+        assert response.json() == client_data
+
+
+def test_upload_clients_csv_recovers_from_stray_quotes_and_bad_encoding(
+    monkeypatch,
+):
+    monkeypatch.setattr(clients_crud.settings, "import_max_line_length", 200)
+    client_ids = [str(uuid4()) for _ in range(4)]
+    body = b"\n".join(
+        [
+            b"client_id,login,age,location,gender",
+            f'{client_ids[0]},stray"quote,25,NYC,MALE'.encode(),
+            f"{client_ids[1]},bad_\xff,25,NYC,MALE".encode("latin-1"),
+            f'{client_ids[2]},"unclosed,25,NYC,MALE'.encode(),
+            *(f"{uuid4()},lost_{i},25,NYC,MALE".encode() for i in range(3)),
+            f"{client_ids[3]},after,25,NYC,MALE".encode(),
+        ]
+    )
+
+    response = client.post("/clients/upload?format=csv", content=body)
+    assert response.status_code == status.HTTP_201_CREATED
+    report = response.json()
+    assert report["rows_loaded"] == 2
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+    assert report["errors"][0]["errors"][0].startswith("Некорректная кодировка")
+    assert report["errors"][1]["errors"][0].startswith("Запись длиннее")
+    assert client.get(f"/clients/{client_ids[0]}").json()["login"] == 'stray"quote'
+    assert client.get(f"/clients/{client_ids[3]}").json()["login"] == "after"
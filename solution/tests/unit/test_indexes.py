@@ -0,0 +1,94 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from src.core.data import settings
+from src.core.database import models
+
+
+campaign_id = uuid4()
+client_id = uuid4()
+
+
+@pytest.mark.parametrize(
+    "stmt, plan_part",
+    [
+        (
+            select(models.Campaign.campaign_id).where(
+                models.Campaign.start_date <= 5,
+                models.Campaign.end_date >= 5,
+                models.Campaign.is_deleted == False,
+            ),
+            "ix_campaigns_active_dates",
+        ),
+        (
+            select(
+                models.UniqueImpression.date,
+                func.count(),
+                func.sum(models.UniqueImpression.cost),
+            )
+            .where(models.UniqueImpression.campaign_id == campaign_id)
+            .group_by(models.UniqueImpression.date),
+            "campaign_id_date_cost_idx",
+        ),
+        (
+            select(
+                models.UniqueClick.date,
+                func.count(),
+                func.sum(models.UniqueClick.cost),
+            )
+            .where(models.UniqueClick.campaign_id == campaign_id)
+            .group_by(models.UniqueClick.date),
+            "campaign_id_date_cost_idx",
+        ),
+        (
+            select(models.UniqueClick.date).where(
+                models.UniqueClick.client_id == client_id,
+                models.UniqueClick.campaign_id == campaign_id,
+            ),
+            "client_id_campaign_id_idx",
+        ),
+        (
+            select(models.UniqueImpression.date).where(
+                models.UniqueImpression.client_id == client_id,
+                models.UniqueImpression.campaign_id == campaign_id,
+            ),
+            "_pkey",
+        ),
+        (
+            select(models.UniqueImpression.client_id).where(
+                models.UniqueImpression.date >= 0,
+                models.UniqueImpression.date < settings.event_partition_size,
+            ),
+            "on unique_impressions_p0 ",
+        ),
+        (
+            select(models.CampaignDailyStat)
+            .where(
+                models.CampaignDailyStat.date >= 10**6,
+                models.CampaignDailyStat.date <= 10**6 + 30,
+            )
+            .order_by(
+                models.CampaignDailyStat.date, models.CampaignDailyStat.campaign_id
+            ),
+            "ix_campaign_daily_stats_date_campaign_id",
+        ),
+    ],
+)
+async def test_hot_queries_use_indexes(stmt, plan_part):
+    engine = create_async_engine(settings.db_url, poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SET enable_seqscan = off"))
+            compiled = stmt.compile(
+                dialect=engine.dialect,
+                compile_kwargs={"literal_binds": True},
+            )
+            result = await connection.execute(text(f"EXPLAIN {compiled}"))
+            plan = "\n".join(result.scalars().all())
+    finally:
+        await engine.dispose()
+
+    assert plan_part in plan
@@ -1,8 +1,18 @@
+import asyncio
+import json
+
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from src.main import app
-from uuid import UUID
+from src.api_v1.ml import crud as ml_crud
+from src.api_v1.ml import schemas as ml_schemas
+from src.core.data import settings
+from src.core.database import models
+from uuid import UUID, uuid4
 
 client = TestClient(app)
 
@@ -74,3 +84,314 @@ def test_add_ml_score_with_nonexistent_client_or_advertiser(sample_ml_score):
     invalid_advertiser_score["advertiser_id"] = "00000000-0000-0000-0000-000000000000"
     response = client.post("/ml-scores", json=invalid_advertiser_score)
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_lowered_max_ml_score_is_recomputed():
+    location = str(uuid4())
+    ml_client = {
+        "client_id": str(uuid4()),
+        "login": "test_user",
+        "age": 25,
+        "location": location,
+        "gender": "MALE",
+    }
+    impression_advertiser = {"advertiser_id": str(uuid4()), "name": "Impressions"}
+    click_advertiser = {"advertiser_id": str(uuid4()), "name": "Clicks"}
+    client.post("/clients/bulk", json=[ml_client])
+    client.post("/advertisers/bulk", json=[impression_advertiser, click_advertiser])
+    campaign = {
+        "impressions_limit": 10,
+        "clicks_limit": 10,
+        "ad_title": "Test Campaign",
+        "ad_text": "Sample text",
+        "start_date": 1,
+        "end_date": 1,
+        "targeting": {"location": location},
+    }
+    client.post(
+        f"/advertisers/{impression_advertiser['advertiser_id']}/campaigns",
+        json={**campaign, "cost_per_impression": 1.0, "cost_per_click": 0},
+    )
+    client.post(
+        f"/advertisers/{click_advertiser['advertiser_id']}/campaigns",
+        json={**campaign, "cost_per_impression": 0, "cost_per_click": 1.5},
+    )
+    client.post("/time/advance", json={"current_date": 1})
+
+    ml_score = {
+        "client_id": ml_client["client_id"],
+        "advertiser_id": click_advertiser["advertiser_id"],
+        "score": 3_000_000,
+    }
+    client.post("/ml-scores", json=ml_score)
+    response = client.post("/ml-scores", json={**ml_score, "score": 1_000_000})
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get(f"/ads?client_id={ml_client['client_id']}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["advertiser_id"] == click_advertiser["advertiser_id"]
+
+
+async def test_upload_ml_scores_upserts_pairs_and_reports_row_errors():
+    location = str(uuid4())
+    clients_data = [
+        {
+            "client_id": str(uuid4()),
+            "login": f"user_{i}",
+            "age": 25,
+            "location": location,
+            "gender": "MALE",
+        }
+        for i in range(2)
+    ]
+    advertiser = {"advertiser_id": str(uuid4()), "name": "Upload Advertiser"}
+    client.post("/clients/bulk", json=clients_data)
+    client.post("/advertisers/bulk", json=[advertiser])
+    existing_score = {
+        "client_id": clients_data[0]["client_id"],
+        "advertiser_id": advertiser["advertiser_id"],
+        "score": 10,
+    }
+    client.post("/ml-scores", json=existing_score)
+
+    advertiser_id = advertiser["advertiser_id"]
+    lines = [
+        "client_id,advertiser_id,score",
+        f"{clients_data[0]['client_id']},{advertiser_id},20",
+        f"{clients_data[1]['client_id']},{advertiser_id},30",
+        f"{uuid4()},{advertiser_id},40",
+        f"{clients_data[1]['client_id']},{advertiser_id},-1",
+        f"{clients_data[1]['client_id']},{uuid4()},50",
+        f"{clients_data[0]['client_id']},{advertiser_id},25",
+    ]
+    response = client.post(
+        "/ml-scores/upload?format=csv", content="\n".join(lines).encode()
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    report = response.json()
+    assert report["rows_total"] == 6
+    assert report["rows_loaded"] == 3
+    assert report["rows_failed"] == 3
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5]
+    assert report["errors"][0]["errors"] == ["Client not found"]
+    assert report["errors"][1]["errors"][0].startswith("score:")
+    assert report["errors"][2]["errors"] == ["Advertiser not found"]
+
+    engine = create_async_engine(settings.db_url, poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            result = await connection.execute(
+                select(models.MLScore.client_id, models.MLScore.score).where(
+                    models.MLScore.advertiser_id == UUID(advertiser_id)
+                )
+            )
+            scores = {str(client_id): score for client_id, score in result.all()}
+    finally:
+        await engine.dispose()
+    assert scores == {
+        clients_data[0]["client_id"]: 25,
+        clients_data[1]["client_id"]: 30,
+    }
+
+
+async def test_publish_ml_score_snapshot_swaps_active_version():
+    location = str(uuid4())
+    ml_client = {
+        "client_id": str(uuid4()),
+        "login": "test_user",
+        "age": 25,
+        "location": location,
+        "gender": "MALE",
+    }
+    advertisers = [
+        {"advertiser_id": str(uuid4()), "name": f"Snapshot {i}"} for i in range(2)
+    ]
+    client.post("/clients/bulk", json=[ml_client])
+    client.post("/advertisers/bulk", json=advertisers)
+    for advertiser in advertisers:
+        client.post(
+            f"/advertisers/{advertiser['advertiser_id']}/campaigns",
+            json={
+                "impressions_limit": 10,
+                "clicks_limit": 10,
+                "cost_per_impression": 0,
+                "cost_per_click": 1.0,
+                "ad_title": "Test Campaign",
+                "ad_text": "Sample text",
+                "start_date": 1,
+                "end_date": 1,
+                "targeting": {"location": location},
+            },
+        )
+    client.post("/time/advance", json={"current_date": 1})
+    client.post(
+        "/ml-scores",
+        json={
+            "client_id": ml_client["client_id"],
+            "advertiser_id": advertisers[0]["advertiser_id"],
+            "score": 100,
+        },
+    )
+    response = client.get(f"/ads?client_id={ml_client['client_id']}")
+    assert response.json()["advertiser_id"] == advertisers[0]["advertiser_id"]
+
+    body = json.dumps(
+        {
+            "client_id": ml_client["client_id"],
+            "advertiser_id": advertisers[1]["advertiser_id"],
+            "score": 50,
+        }
+    )
+    response = client.post("/ml-scores/snapshots", content=body.encode())
+    assert response.status_code == status.HTTP_201_CREATED
+    report = response.json()
+    assert report["rows_loaded"] == 1
+    version = report["version"]
+
+    response = client.get(f"/ads?client_id={ml_client['client_id']}")
+    assert response.json()["advertiser_id"] == advertisers[1]["advertiser_id"]
+
+    engine = create_async_engine(settings.db_url, poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            state = (
+                await connection.execute(
+                    select(
+                        models.MLScoreState.active_version,
+                        models.MLScoreState.max_score,
+                    )
+                )
+            ).one()
+            partitions = await connection.scalars(
+                text(
+                    "SELECT inhrelid::regclass::text FROM pg_inherits "
+                    "WHERE inhparent = 'mlscores'::regclass"
+                )
+            )
+            partitions = partitions.all()
+    finally:
+        await engine.dispose()
+    assert state.active_version == version
+    assert state.max_score == 50
+    assert partitions == [f"mlscores_v{version}"]
+
+
+def test_publish_empty_ml_score_snapshot_is_rejected():
+    response = client.post(
+        "/ml-scores/snapshots?format=csv",
+        content=f"client_id,advertiser_id,score\n{uuid4()},{uuid4()},-1".encode(),
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_drop_inactive_ml_score_versions_keeps_active_and_newer():
+    engine = create_async_engine(settings.db_url, poolclass=NullPool)
+    try:
+        async with engine.begin() as connection:
+            active_version = await connection.scalar(
+                select(models.MLScoreState.active_version)
+            )
+            for version in (active_version - 1, active_version + 1000):
+                await connection.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS mlscores_v{version} "
+                        "(LIKE mlscores INCLUDING DEFAULTS)"
+                    )
+                )
+
+        await ml_crud.drop_inactive_ml_score_versions()
+
+        async with engine.begin() as connection:
+            tables = await connection.scalars(
+                text(
+                    "SELECT relname FROM pg_class WHERE relname ~ '^mlscores_v[0-9]+$'"
+                )
+            )
+            tables = set(tables.all())
+            await connection.execute(
+                text(f"DROP TABLE mlscores_v{active_version + 1000}")
+            )
+    finally:
+        await engine.dispose()
+    assert f"mlscores_v{active_version - 1}" not in tables
+    assert f"mlscores_v{active_version}" in tables
+    assert f"mlscores_v{active_version + 1000}" in tables
+
+
+async def test_concurrent_ml_score_writes_keep_max_score_exact():
+    ml_client = {
+        "client_id": str(uuid4()),
+        "login": "max_score_user",
+        "age": 30,
+        "location": "NYC",
+        "gender": "MALE",
+    }
+    advertisers = [
+        {"advertiser_id": str(uuid4()), "name": f"Advertiser {index}"}
+        for index in range(2)
+    ]
+    real_max_score = select(func.max(models.MLScore.score)).where(
+        models.MLScore.version == ml_crud.get_active_ml_score_version()
+    )
+    engine = create_async_engine(settings.db_url, poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.connect() as connection:
+            raised_score = (await connection.scalar(real_max_score) or 0) + 1
+        client.post("/clients/bulk", json=[ml_client])
+        client.post("/advertisers/bulk", json=advertisers)
+        for advertiser, score in zip(advertisers, (raised_score + 1, 0)):
+            response = client.post(
+                "/ml-scores",
+                json={
+                    "client_id": ml_client["client_id"],
+                    "advertiser_id": advertiser["advertiser_id"],
+                    "score": score,
+                },
+            )
+            assert response.status_code == status.HTTP_200_OK
+
+        async with session_factory() as raising, session_factory() as lowering:
+            raising_state = await ml_crud.lock_ml_score_state(raising, shared=True)
+            await raising.execute(
+                update(models.MLScore)
+                .where(
+                    models.MLScore.client_id == ml_client["client_id"],
+                    models.MLScore.advertiser_id == advertisers[1]["advertiser_id"],
+                    models.MLScore.version == raising_state.active_version,
+                )
+                .values(score=raised_score)
+            )
+            await ml_crud.update_max_ml_score(
+                ml_score_state=raising_state,
+                previous_score=0,
+                score=raised_score,
+                session=raising,
+            )
+
+            lower = asyncio.create_task(
+                ml_crud.update_ml_score(
+                    ml_score_in=ml_schemas.MLScoreCreate(
+                        client_id=ml_client["client_id"],
+                        advertiser_id=advertisers[0]["advertiser_id"],
+                        score=0,
+                    ),
+                    session=lowering,
+                )
+            )
+            await asyncio.sleep(0.5)
+            await raising.commit()
+            await asyncio.wait_for(lower, timeout=5)
+
+        async with engine.connect() as connection:
+            max_score = await connection.scalar(select(models.MLScoreState.max_score))
+            assert await connection.scalar(real_max_score) == raised_score
+            assert (
+                await connection.scalar(
+                    select(func.count()).select_from(models.MLScoreState)
+                )
+                == 1
+            )
+    finally:
+        await engine.dispose()
+    assert max_score == raised_score
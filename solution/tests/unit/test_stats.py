@@ -1,8 +1,21 @@
+import asyncio
+import csv
+import io
+import json
 import uuid
+from types import SimpleNamespace
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
 from src.main import app
+from src.api_v1.stats import crud as stats_crud
+from src.core.data import settings
+from src.core.database.helpers.notification_listener import NotificationListener
+from src.core.utils.daily_stats_cache import daily_stats_cache
+from src.core.utils.dashboard_metrics_cache import dashboard_metrics_cache
+from src.core.utils.prefix_sum_index import PrefixSumIndex, prefix_sum_index
 from datetime import datetime
 
 client = TestClient(app)
@@ -192,3 +205,404 @@ def test_multi_day_stats(setup_data, client=client):
     assert advertiser_daily_stats[0] == day_1_stats
     assert advertiser_daily_stats[1] == day_2_stats
     assert advertiser_daily_stats[2] == day_3_stats
+
+
+def get_rounded_stats(url):
+    stats = client.get(url).json()
+    return [
+        {key: round(value, 6) for key, value in stat.items()}
+        for stat in (stats if isinstance(stats, list) else [stats])
+    ]
+
+
+async def test_rebuild_daily_stats_matches_rollups(setup_data):
+    client_id = setup_data["client_id"]
+    ad_response = client.get(f"/ads?client_id={client_id}").json()
+    advertiser_id = ad_response["advertiser_id"]
+    campaign_id = ad_response["ad_id"]
+    client.post(f"/ads/{campaign_id}/click", json={"client_id": client_id})
+
+    urls = [
+        f"/stats/campaigns/{campaign_id}",
+        f"/stats/campaigns/{campaign_id}/daily",
+        f"/stats/advertisers/{advertiser_id}/campaigns",
+        f"/stats/advertisers/{advertiser_id}/campaigns/daily",
+    ]
+    expected = [get_rounded_stats(url) for url in urls]
+    assert expected[0][0]["clicks_count"] >= 1
+
+    listener = NotificationListener(url=settings.db_url)
+    payloads = asyncio.Queue()
+    listener.add_handler(stats_crud.DAILY_STATS_CHANNEL, payloads.put_nowait)
+    await listener.start()
+    engine = create_async_engine(settings.db_url, poolclass=NullPool)
+    try:
+        assert await asyncio.wait_for(payloads.get(), timeout=5) is None
+        async with AsyncSession(engine) as session:
+            await stats_crud.rebuild_daily_stats(session=session)
+        assert await asyncio.wait_for(payloads.get(), timeout=5) == ""
+    finally:
+        await engine.dispose()
+        await listener.stop()
+
+    assert [get_rounded_stats(url) for url in urls] == expected
+    client.get("/stats/dashboard")
+    assert len(dashboard_metrics_cache) > 0
+    stats_crud.handle_daily_stats_notification("")
+    assert len(dashboard_metrics_cache) == 0
+
+
+def test_daily_stats_cache_keeps_finished_days(sample_advertiser, sample_campaign):
+    location = str(uuid.uuid4())
+    clients = [
+        {
+            "client_id": str(uuid.uuid4()),
+            "login": f"user_{i}",
+            "age": 103,
+            "location": location,
+            "gender": "MALE",
+        }
+        for i in range(2)
+    ]
+    client.post("/clients/bulk", json=clients)
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    sample_campaign["targeting"]["location"] = location
+    campaign_id = client.post(
+        f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+    ).json()["campaign_id"]
+    cache_key = ("campaign_daily_stats", uuid.UUID(campaign_id))
+
+    client.post("/time/advance", json={"current_date": 1})
+    client.get(f"/ads?client_id={clients[0]['client_id']}")
+    client.post("/time/advance", json={"current_date": 2})
+    client.get(f"/ads?client_id={clients[1]['client_id']}")
+
+    response = client.get(f"/stats/campaigns/{campaign_id}/daily")
+    assert [day["impressions_count"] for day in response.json()] == [1, 1]
+    cached_days, cached_until = daily_stats_cache.get(key=cache_key, current_day=2)
+    assert [day.date for day in cached_days] == [1]
+    assert cached_until == 2
+
+    client.post("/time/advance", json={"current_date": 1})
+    assert daily_stats_cache.get(key=cache_key, current_day=1) == ([], None)
+    client.get(f"/ads?client_id={clients[0]['client_id']}")
+    client.post("/time/advance", json={"current_date": 2})
+
+    response = client.get(f"/stats/campaigns/{campaign_id}/daily")
+    assert [day["impressions_count"] for day in response.json()] == [2, 1]
+
+
+def test_bulk_campaign_stats(sample_advertiser, sample_campaign):
+    location = str(uuid.uuid4())
+    sample_client = {
+        "client_id": str(uuid.uuid4()),
+        "login": "user",
+        "age": 103,
+        "location": location,
+        "gender": "MALE",
+    }
+    client.post("/clients/bulk", json=[sample_client])
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    sample_campaign["targeting"]["location"] = location
+    campaign_ids = [
+        client.post(
+            f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+        ).json()["campaign_id"]
+        for _ in range(2)
+    ]
+    client.post("/time/advance", json={"current_date": 1})
+    ad_id = client.get(f"/ads?client_id={sample_client['client_id']}").json()["ad_id"]
+    client.post(f"/ads/{ad_id}/click", json={"client_id": sample_client["client_id"]})
+
+    response = client.post(
+        "/stats/campaigns/bulk",
+        json={"campaign_ids": [*campaign_ids, str(uuid.uuid4())]},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    stats = {stat["campaign_id"]: stat for stat in response.json()}
+    assert set(stats) == set(campaign_ids)
+    for campaign_id in campaign_ids:
+        single_stat = client.get(f"/stats/campaigns/{campaign_id}").json()
+        assert stats[campaign_id] == {
+            "campaign_id": campaign_id,
+            "daily": None,
+            **single_stat,
+        }
+    assert stats[ad_id]["clicks_count"] == 1
+
+    response = client.post(
+        "/stats/campaigns/bulk",
+        json={"advertiser_id": advertiser_id, "include_daily": True},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    stats = {stat["campaign_id"]: stat for stat in response.json()}
+    assert set(campaign_ids) <= set(stats)
+    assert stats[ad_id]["daily"] == client.get(f"/stats/campaigns/{ad_id}/daily").json()
+    assert stats[ad_id]["impressions_count"] == 1
+    idle_campaign_id = next(id for id in campaign_ids if id != ad_id)
+    assert stats[idle_campaign_id]["daily"] == []
+    assert stats[idle_campaign_id]["impressions_count"] == 0
+
+
+def test_bulk_campaign_stats_requires_one_selector(sample_advertiser):
+    response = client.post("/stats/campaigns/bulk", json={})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    response = client.post(
+        "/stats/campaigns/bulk",
+        json={
+            "campaign_ids": [str(uuid.uuid4())],
+            "advertiser_id": sample_advertiser["advertiser_id"],
+        },
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_export_daily_stats_and_events(setup_data):
+    client_id = setup_data["client_id"]
+    ad_response = client.get(f"/ads?client_id={client_id}").json()
+    campaign_id = ad_response["ad_id"]
+    client.post(f"/ads/{campaign_id}/click", json={"client_id": client_id})
+
+    response = client.get(f"/stats/export/daily?campaign_id={campaign_id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    exported_days = [json.loads(line) for line in response.text.splitlines()]
+    daily_stats = client.get(f"/stats/campaigns/{campaign_id}/daily").json()
+    assert exported_days == [{**day, "campaign_id": campaign_id} for day in daily_stats]
+
+    response = client.get(
+        f"/stats/export/events?campaign_id={campaign_id}&from_date=1&to_date=1"
+        "&format=csv"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    events = list(csv.DictReader(io.StringIO(response.text)))
+    client_events = {
+        event["event_type"] for event in events if event["client_id"] == client_id
+    }
+    assert client_events == {"impression", "click"}
+    assert {event["date"] for event in events} == {"1"}
+
+    response = client.get(
+        f"/stats/export/events?campaign_id={campaign_id}&from_date=100"
+    )
+    assert response.text == ""
+
+    response = client.get(f"/stats/export/events?campaign_id={uuid.uuid4()}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_daily_stats_filters_and_pagination(sample_advertiser, sample_campaign):
+    location = str(uuid.uuid4())
+    clients = [
+        {
+            "client_id": str(uuid.uuid4()),
+            "login": f"user_{i}",
+            "age": 103,
+            "location": location,
+            "gender": "MALE",
+        }
+        for i in range(3)
+    ]
+    client.post("/clients/bulk", json=clients)
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    sample_campaign["targeting"]["location"] = location
+    campaign_id = client.post(
+        f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+    ).json()["campaign_id"]
+    for date, sample_client in enumerate(clients, start=1):
+        client.post("/time/advance", json={"current_date": date})
+        client.get(f"/ads?client_id={sample_client['client_id']}")
+
+    url = f"/stats/campaigns/{campaign_id}/daily"
+    for params, dates in (
+        ("", [1, 2, 3]),
+        ("?from_date=2", [2, 3]),
+        ("?to_date=2", [1, 2]),
+        ("?limit=2", [1, 2]),
+        ("?cursor=2", [3]),
+        ("?cursor=1&limit=1", [2]),
+        ("?from_date=2&to_date=2", [2]),
+    ):
+        response = client.get(url + params)
+        assert response.status_code == status.HTTP_200_OK
+        assert [day["date"] for day in response.json()] == dates
+
+    response = client.get(f"{url}?from_date=3&to_date=2")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_range_stats_match_daily_stats(sample_advertiser, sample_campaign):
+    location = str(uuid.uuid4())
+    clients = [
+        {
+            "client_id": str(uuid.uuid4()),
+            "login": f"user_{i}",
+            "age": 103,
+            "location": location,
+            "gender": "MALE",
+        }
+        for i in range(4)
+    ]
+    client.post("/clients/bulk", json=clients)
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    sample_campaign["targeting"]["location"] = location
+    campaign_id = client.post(
+        f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+    ).json()["campaign_id"]
+    for date, sample_client in zip((1, 2, 2, 4), clients):
+        client.post("/time/advance", json={"current_date": date})
+        client_id = sample_client["client_id"]
+        client.get(f"/ads?client_id={client_id}")
+        client.post(f"/ads/{campaign_id}/click", json={"client_id": client_id})
+
+    daily_stats = client.get(f"/stats/campaigns/{campaign_id}/daily").json()
+    for _ in range(2):
+        for from_date, to_date in ((0, 10), (1, 1), (2, 3), (1, 4), (3, 3), (4, 9)):
+            response = client.post(
+                "/stats/campaigns/range",
+                json={
+                    "campaign_ids": [campaign_id],
+                    "from_date": from_date,
+                    "to_date": to_date,
+                },
+            )
+            assert response.status_code == status.HTTP_200_OK
+            [range_stat] = response.json()
+            days = [day for day in daily_stats if from_date <= day["date"] <= to_date]
+            assert range_stat["impressions_count"] == sum(
+                day["impressions_count"] for day in days
+            )
+            assert range_stat["clicks_count"] == sum(
+                day["clicks_count"] for day in days
+            )
+            assert round(range_stat["spent_total"], 6) == round(
+                sum(day["spent_total"] for day in days), 6
+            )
+        assert prefix_sum_index.get(key=uuid.UUID(campaign_id), current_day=4)
+
+    response = client.post(
+        "/stats/campaigns/range",
+        json={"advertiser_id": advertiser_id, "from_date": 2, "to_date": 1},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_campaigns_reach_counts_unique_clients(sample_advertiser, sample_campaign):
+    location = str(uuid.uuid4())
+    client_ids = [str(uuid.uuid4()) for _ in range(3)]
+    client.post(
+        "/clients/bulk",
+        json=[
+            {
+                "client_id": client_id,
+                "login": "user",
+                "age": 103,
+                "location": location,
+                "gender": "MALE",
+            }
+            for client_id in client_ids
+        ],
+    )
+    advertiser_id = sample_advertiser["advertiser_id"]
+    client.post("/advertisers/bulk", json=[sample_advertiser])
+    sample_campaign["targeting"]["location"] = location
+    campaign_ids = [
+        client.post(
+            f"/advertisers/{advertiser_id}/campaigns", json=sample_campaign
+        ).json()["campaign_id"]
+        for _ in range(2)
+    ]
+    for current_date in (1, 2):
+        client.post("/time/advance", json={"current_date": current_date})
+        for client_id in client_ids:
+            client.get(f"/ads?client_id={client_id}")
+    ad_id = client.get(f"/ads?client_id={client_ids[0]}").json()["ad_id"]
+    client.post(f"/ads/{ad_id}/click", json={"client_id": client_ids[0]})
+
+    for selector in ({"campaign_ids": campaign_ids}, {"advertiser_id": advertiser_id}):
+        response = client.post("/stats/campaigns/reach", json=selector)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"impressions_reach": 3, "clicks_reach": 1}
+
+    response = client.post(
+        "/stats/campaigns/reach",
+        json={"campaign_ids": campaign_ids, "to_date": 0},
+    )
+    assert response.json() == {"impressions_reach": 0, "clicks_reach": 0}
+
+    response = client.post(
+        "/stats/campaigns/reach",
+        json={"campaign_ids": campaign_ids, "from_date": 2, "to_date": 1},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_dashboard_metrics_refresh_on_time_advance(setup_data):
+    client_id = setup_data["client_id"]
+    ad_id = client.get(f"/ads?client_id={client_id}").json()["ad_id"]
+    client.post("/time/advance", json={"current_date": 1})
+
+    response = client.get("/stats/dashboard", params={"from_date": 1, "to_date": 1})
+    assert response.status_code == status.HTTP_200_OK
+    metrics = response.json()
+    campaign_stats = {
+        day_stat["campaign_id"]: day_stat for day_stat in metrics["campaigns_daily"]
+    }
+    assert campaign_stats[ad_id]["impressions_count"] >= 1
+    assert [day_stat["date"] for day_stat in metrics["daily"]] == [1]
+    clicks_count = campaign_stats[ad_id]["clicks_count"]
+
+    client.post(f"/ads/{ad_id}/click", json={"client_id": client_id})
+    response = client.get("/stats/dashboard", params={"from_date": 1, "to_date": 1})
+    assert response.json() == metrics
+
+    client.post("/time/advance", json={"current_date": 1})
+    response = client.get("/stats/dashboard", params={"from_date": 1, "to_date": 1})
+    campaign_stats = {
+        day_stat["campaign_id"]: day_stat
+        for day_stat in response.json()["campaigns_daily"]
+    }
+    assert campaign_stats[ad_id]["clicks_count"] == clicks_count + 1
+    assert campaign_stats[ad_id] == {
+        "campaign_id": ad_id,
+        **client.get(f"/stats/campaigns/{ad_id}/daily").json()[0],
+    }
+
+
+def test_dashboard_metrics_cached_per_window(setup_data):
+    client.post("/time/advance", json={"current_date": 1})
+    response = client.get("/stats/dashboard", params={"from_date": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert all(day_stat["date"] >= 2 for day_stat in response.json()["daily"])
+
+    response = client.get("/stats/dashboard", params={"from_date": 1, "to_date": 1})
+    assert [day_stat["date"] for day_stat in response.json()["daily"]] == [1]
+    assert dashboard_metrics_cache.get((2, None)) is not None
+    assert dashboard_metrics_cache.get((1, 1)) is not None
+
+
+def test_prefix_sum_index_stores_only_days_with_data():
+    index = PrefixSumIndex(columns=["clicks_count"], max_days=4)
+    current_day = 10**9
+    index.set_current_day(current_day)
+    days = [
+        SimpleNamespace(date=date, clicks_count=clicks)
+        for date, clicks in ((1, 2), (500, 3), (current_day - 1, 5))
+    ]
+    index.extend(key="campaign", days=days, cached_from=None, cached_until=current_day)
+
+    prefix_sums = index.get(key="campaign", current_day=current_day)
+    assert len(index) == 4
+    assert prefix_sums.get_range("clicks_count", 0, current_day) == 10
+    assert prefix_sums.get_range("clicks_count", 2, 500) == 3
+    assert prefix_sums.get_range("clicks_count", 501, current_day - 2) == 0
+    assert prefix_sums.get_range("clicks_count", 500, 1) == 0
+
+    index.extend(key="other", days=days * 2, cached_from=None, cached_until=current_day)
+    assert index.get(key="other", current_day=current_day) is None
+    assert len(index) == 4
@@ -0,0 +1,140 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from src.main import app
+from src.api_v1.time import crud as time_crud
+from src.core.data import settings
+from src.core.database.helpers.event_partitions import EventPartitionMaintainer
+from src.core.database.helpers.notification_listener import NotificationListener
+
+client = TestClient(app)
+
+
+def test_advance_time_updates_cached_date():
+    response = client.post("/time/advance", json={"current_date": 3})
+    assert response.status_code == status.HTTP_200_OK
+    cached_date = time_crud.current_date_cache.get(time_crud.CURRENT_DATE_KEY)
+    assert cached_date.current_date == 3
+
+
+async def test_get_current_date_skips_stale_cache_fill():
+    class StaleSession:
+        async def execute(self, stmt):
+            time_crud.handle_current_date_notification("9")
+            return self
+
+        def scalar_one_or_none(self):
+            return SimpleNamespace(current_date=5)
+
+    time_crud.current_date_cache.invalidate(time_crud.CURRENT_DATE_KEY)
+    current_date = await time_crud.get_current_date(session=StaleSession())
+    assert current_date.current_date == 5
+    cached_date = time_crud.current_date_cache.get(time_crud.CURRENT_DATE_KEY)
+    assert cached_date.current_date == 9
+    time_crud.current_date_cache.invalidate(time_crud.CURRENT_DATE_KEY)
+
+
+async def test_advance_time_notifies_listeners():
+    listener = NotificationListener(url=settings.db_url)
+    payloads = asyncio.Queue()
+    listener.add_handler(time_crud.CURRENT_DATE_CHANNEL, payloads.put_nowait)
+    await listener.start()
+    try:
+        assert await asyncio.wait_for(payloads.get(), timeout=5) is None
+
+        response = client.post("/time/advance", json={"current_date": 4})
+        assert response.status_code == status.HTTP_200_OK
+        assert await asyncio.wait_for(payloads.get(), timeout=5) == "4"
+    finally:
+        await listener.stop()
+
+
+async def test_event_partition_maintenance_moves_default_rows():
+    size = settings.event_partition_size
+    day = 1000 * size + 5
+    client_id = str(uuid4())
+    advertiser_id = str(uuid4())
+    location = str(uuid4())
+    client.post(
+        "/clients/bulk",
+        json=[
+            {
+                "client_id": client_id,
+                "login": "partition_user",
+                "age": 25,
+                "location": location,
+                "gender": "MALE",
+            }
+        ],
+    )
+    client.post(
+        "/advertisers/bulk", json=[{"advertiser_id": advertiser_id, "name": "Test"}]
+    )
+    response = client.post(
+        f"/advertisers/{advertiser_id}/campaigns",
+        json={
+            "impressions_limit": 10,
+            "clicks_limit": 10,
+            "cost_per_impression": 0.1,
+            "cost_per_click": 0.5,
+            "ad_title": "Test Campaign",
+            "ad_text": "Sample text",
+            "start_date": day,
+            "end_date": day,
+            "targeting": {"location": location},
+        },
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    client.post("/time/advance", json={"current_date": day})
+    assert client.get(f"/ads?client_id={client_id}").status_code == status.HTTP_200_OK
+
+    engine = create_async_engine(settings.db_url, poolclass=NullPool)
+    partitions = [
+        f"{table}_p{start}"
+        for table in ("unique_impressions", "unique_clicks")
+        for start in (1000 * size, 1001 * size)
+    ]
+    maintainer = EventPartitionMaintainer(
+        engine=engine,
+        tables=("unique_impressions", "unique_clicks"),
+        partition_size=size,
+        lookahead=1,
+        interval=60,
+        lock_timeout_ms=1_000,
+    )
+    try:
+        await maintainer.maintain()
+        async with engine.connect() as connection:
+            for partition in partitions:
+                assert await connection.scalar(
+                    text(f"SELECT to_regclass('{partition}')")
+                )
+            assert (
+                await connection.scalar(
+                    text(
+                        f"SELECT count(*) FROM unique_impressions_p{1000 * size} "
+                        f"WHERE client_id = '{client_id}'"
+                    )
+                )
+                == 1
+            )
+            assert (
+                await connection.scalar(
+                    text(
+                        f"SELECT count(*) FROM unique_impressions_default WHERE date = {day}"
+                    )
+                )
+                == 0
+            )
+    finally:
+        async with engine.begin() as connection:
+            for partition in partitions:
+                await connection.execute(text(f"DROP TABLE IF EXISTS {partition}"))
+        await engine.dispose()
+        client.post("/time/advance", json={"current_date": 1})